@@ -0,0 +1,88 @@
+"""
+Client-side HTTP cache for GET calls to the mock services (ETag / Cache-Control aware).
+Shared by the agents (backend/agents/*/main.py put this directory on sys.path).
+
+CachingTransport wraps httpx's transport:
+- While an entry is fresh (inside the server's max-age), it is served with no network call.
+- A stale entry is revalidated with If-None-Match. A 304 refreshes it and returns the stored
+  body, so the server neither queries nor serialises anything new.
+- Only 200 responses that carry an ETag and are not `no-store` are kept. LRU-bounded.
+"""
+import re
+import time
+from collections import OrderedDict
+
+import httpx
+
+MAX_AGE_PATTERN = re.compile(r"max-age=(\d+)")
+# Stored bodies are already decoded, so these must not be replayed with them
+HOP_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+
+def _freshness_seconds(cache_control: str) -> float:
+    if "no-cache" in cache_control:
+        return 0.0
+    match = MAX_AGE_PATTERN.search(cache_control)
+    return float(match.group(1)) if match else 0.0
+
+
+class CachingTransport(httpx.AsyncBaseTransport):
+    def __init__(self, transport: httpx.AsyncBaseTransport = None, max_entries: int = 5000):
+        self.transport = transport or httpx.AsyncHTTPTransport()
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        self.metrics = {"fresh_hits": 0, "revalidated": 0, "misses": 0, "stored": 0, "evictions": 0}
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if request.method != "GET":
+            return await self.transport.handle_async_request(request)
+
+        key = str(request.url)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            if time.monotonic() < entry["expires_at"]:
+                self.metrics["fresh_hits"] += 1
+                return self._from_entry(entry, request)
+            request.headers["If-None-Match"] = entry["etag"]
+
+        response = await self.transport.handle_async_request(request)
+
+        if entry is not None and response.status_code == 304:
+            await response.aclose()
+            self.metrics["revalidated"] += 1
+            entry["expires_at"] = time.monotonic() + _freshness_seconds(response.headers.get("cache-control", ""))
+            return self._from_entry(entry, request)
+
+        self.metrics["misses"] += 1
+        cache_control = response.headers.get("cache-control", "")
+        etag = response.headers.get("etag")
+        if response.status_code != 200 or not etag or "no-store" in cache_control:
+            if entry is not None:
+                self._entries.pop(key, None)
+            return response
+
+        content = await response.aread()
+        headers = [(k, v) for k, v in response.headers.multi_items() if k.lower() not in HOP_HEADERS]
+        self._entries[key] = {
+            "etag": etag,
+            "headers": headers,
+            "content": content,
+            "expires_at": time.monotonic() + _freshness_seconds(cache_control),
+        }
+        self._entries.move_to_end(key)
+        self.metrics["stored"] += 1
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.metrics["evictions"] += 1
+        return httpx.Response(200, headers=headers, content=content, request=request)
+
+    @staticmethod
+    def _from_entry(entry: dict, request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, headers=entry["headers"], content=entry["content"], request=request)
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+    def stats(self) -> dict:
+        return {**self.metrics, "size": len(self._entries)}
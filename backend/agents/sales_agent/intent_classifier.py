@@ -0,0 +1,267 @@
+"""
+Intent classification + FAQ fast-answer engine for the Sales Agent.
+
+All synonyms are compiled into ONE regex alternation at load time, so a message is
+scanned once regardless of how many phrases we know about. High-confidence factual
+questions (e.g. "what is MUDRA loan?", "mudra yojana kya hai") are answered from
+templates built out of the scheme knowledge base, without calling Gemini.
+"""
+import json
+import logging
+import os
+import re
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# --- Intents ---
+INTENT_OFFER = "offer"              # "what is my limit", "kitna loan milega"
+INTENT_INTEREST_RATE = "interest_rate"
+INTENT_DOCUMENTS = "documents"
+INTENT_ELIGIBILITY = "eligibility"
+INTENT_SCHEME_INFO = "scheme_info"  # government schemes / subsidies
+INTENT_PRODUCT_ADVICE = "product_advice"  # car/home/business loans, comparisons, advice
+
+# Intents that need the knowledge base / LLM rather than the customer's offer row
+GENERAL_INTENTS = {INTENT_SCHEME_INFO, INTENT_PRODUCT_ADVICE, INTENT_ELIGIBILITY}
+# A scheme summary doesn't answer these, so a message mentioning them never gets the scheme template
+SPECIFIC_QUESTION_INTENTS = {INTENT_INTEREST_RATE, INTENT_ELIGIBILITY, INTENT_DOCUMENTS}
+
+# --- Default Synonym Dictionary (English + Hindi/Hinglish) ---
+# Override or extend via a JSON file of the same shape: SALES_INTENT_SYNONYMS_FILE
+DEFAULT_INTENT_SYNONYMS: Dict[str, List[str]] = {
+    INTENT_OFFER: [
+        "my offer", "pre-approved", "pre approved", "preapproved", "my limit", "loan limit",
+        "how much loan", "how much can i get", "kitna loan", "kitna milega", "mera offer",
+        "meri limit", "मेरा ऑफर", "कितना लोन",
+    ],
+    INTENT_INTEREST_RATE: [
+        "interest rate", "interest", "rate of interest", "roi", "byaj", "byaaj",
+        "byaj dar", "ब्याज", "ब्याज दर",
+    ],
+    INTENT_DOCUMENTS: [
+        "documents", "document required", "documents required", "papers", "kyc", "kagaz",
+        "kaagaz", "dastavez", "dastavej", "कागज", "दस्तावेज",
+    ],
+    INTENT_ELIGIBILITY: [
+        "eligible", "eligibility", "who can apply", "qualify", "patrata", "kaun apply",
+        "पात्रता", "योग्यता",
+    ],
+    INTENT_SCHEME_INFO: [
+        "scheme", "schemes", "government", "govt", "subsidy", "yojana", "yojna", "sarkari",
+        "mudra", "pmegp", "pmay", "stand up india", "standup india", "exporter", "योजना",
+        "सरकारी", "सब्सिडी",
+    ],
+    INTENT_PRODUCT_ADVICE: [
+        # "home" and "rates" were general-query keywords before the classifier; keep routing them to the LLM
+        "car", "home loan", "home", "house", "business", "market", "rates", "advice", "should i", "recommend",
+        "type of loan", "types of loan", "options", "compare", "comparison", "better",
+        "education", "tractor", "medical", "ghar", "gaadi", "gadi", "vyapar", "dhandha",
+        "kaunsa loan", "konsa loan", "घर", "गाड़ी", "व्यापार",
+    ],
+}
+
+# Cues that the user wants a factual answer rather than a conversation
+QUESTION_CUES = [
+    "what is", "what's", "tell me about", "explain", "details of", "details about",
+    "kya hai", "kya hota hai", "batao", "bataiye", "क्या है", "बताइए", "बताओ",
+]
+
+# Words that do not identify a particular scheme on their own
+_NAME_STOPWORDS = {
+    "pradhan", "mantri", "yojana", "yojna", "scheme", "schemes", "loan", "loans", "credit",
+    "for", "of", "the", "and", "under", "india", "national", "government", "programme",
+    "program", "fund", "guarantee", "interest", "subsidy", "linked", "capital", "with",
+    # Generic words users say about any loan ("small business loan")
+    "small", "micro", "medium", "business", "enterprise", "enterprises", "industries", "industry",
+    "bank", "finance", "financing", "development", "employment", "generation", "women", "rural",
+    "urban", "new", "mission", "support", "startup", "startups", "trust",
+}
+
+FAQ_CONFIDENCE_THRESHOLD = float(os.getenv("SALES_FAQ_CONFIDENCE_THRESHOLD", "0.8"))
+# Intent strength for one keyword hit; each extra hit adds 0.1. Kept below the threshold
+# so a single word ("documents") is never enough for a canned answer.
+SINGLE_HIT_STRENGTH = 0.7
+
+# \w misses Indic vowel signs/viramas (e.g. the "ा" in "घराना"), so treat the Indic blocks
+# and ZWNJ/ZWJ as word characters too - otherwise "घर" would match inside "घराना".
+_WORD_CHAR = r"[\w\u0900-\u0DFF\u200c\u200d]"
+
+
+def _compile_alternation(phrases: List[str]) -> re.Pattern:
+    """Longest-first alternation with word boundaries that also hold for Devanagari."""
+    ordered = sorted({p.lower() for p in phrases if p}, key=len, reverse=True)
+    body = "|".join(re.escape(p) for p in ordered)
+    return re.compile(rf"(?<!{_WORD_CHAR})(?:{body})(?!{_WORD_CHAR})", re.IGNORECASE)
+
+
+def load_intent_synonyms(path: Optional[str] = None) -> Dict[str, List[str]]:
+    """Defaults merged with an optional JSON override file ({intent: [phrases]})."""
+    synonyms = {intent: list(phrases) for intent, phrases in DEFAULT_INTENT_SYNONYMS.items()}
+    path = path or os.getenv("SALES_INTENT_SYNONYMS_FILE")
+    if not path:
+        return synonyms
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            overrides = json.load(f)
+        for intent, phrases in overrides.items():
+            synonyms.setdefault(intent, []).extend(phrases)
+        logger.info(f"Loaded intent synonym overrides from {path}")
+    except Exception as e:
+        logger.error(f"Could not load intent synonyms from {path}: {e}")
+    return synonyms
+
+
+class IntentClassifier:
+    """Single-pass multi-pattern matcher over a synonym dictionary."""
+
+    def __init__(self, synonyms: Dict[str, List[str]]):
+        self.phrase_to_intent: Dict[str, str] = {}
+        for intent, phrases in synonyms.items():
+            for phrase in phrases:
+                # First intent listed wins if a phrase is (mis)configured twice
+                self.phrase_to_intent.setdefault(phrase.lower(), intent)
+        self.pattern = _compile_alternation(list(self.phrase_to_intent))
+        self.question_pattern = _compile_alternation(QUESTION_CUES)
+
+    def classify(self, message: str) -> dict:
+        """
+        Returns {"intent", "confidence", "scores", "matches", "is_question"}.
+        Confidence grows with the number of hits for the winning intent (one hit stays
+        below FAQ_CONFIDENCE_THRESHOLD) and shrinks when other intents compete.
+        """
+        text = (message or "").lower()
+        hits: Dict[str, List[str]] = {}
+        for match in self.pattern.finditer(text):
+            phrase = match.group(0)
+            hits.setdefault(self.phrase_to_intent[phrase], []).append(phrase)
+
+        is_question = bool(self.question_pattern.search(text)) or text.rstrip().endswith("?")
+        if not hits:
+            return {"intent": None, "confidence": 0.0, "scores": {}, "matches": {}, "is_question": is_question}
+
+        total_hits = sum(len(v) for v in hits.values())
+        scores = {}
+        for intent, phrases in hits.items():
+            strength = min(0.98, SINGLE_HIT_STRENGTH + 0.1 * (len(phrases) - 1))
+            scores[intent] = round(strength * len(phrases) / total_hits, 3)
+
+        # Ties go to the knowledge-base intents, as the old keyword routing sent any general word to the LLM
+        intent = max(scores, key=lambda i: (scores[i], i in GENERAL_INTENTS))
+        return {
+            "intent": intent,
+            "confidence": scores[intent],
+            "scores": scores,
+            "matches": hits,
+            "is_question": is_question,
+        }
+
+
+class FaqStore:
+    """Template answers keyed by scheme aliases, built from the scraped knowledge base."""
+
+    def __init__(self, schemes: List[dict]):
+        self.entries: List[dict] = []
+        alias_to_entry: Dict[str, int] = {}
+        token_owner: Dict[str, Optional[int]] = {}
+
+        for scheme in schemes:
+            name = (scheme.get("scheme_name") or "").strip()
+            if not name or name == "N/A":
+                continue
+            idx = len(self.entries)
+            self.entries.append({
+                "scheme_name": name,
+                "tab": scheme.get("tab", ""),
+                "summary": self._summarise(scheme),
+            })
+            alias_to_entry.setdefault(name.lower(), idx)
+            # Acronyms in brackets, e.g. "(PMEGP)"
+            for acronym in re.findall(r"\(([A-Za-z\-]{2,})\)", name):
+                alias_to_entry.setdefault(acronym.lower(), idx)
+            # Distinctive single words (only kept if no other scheme uses them)
+            for token in re.findall(r"[A-Za-z][A-Za-z\-]{3,}", name.lower()):
+                if token in _NAME_STOPWORDS:
+                    continue
+                token_owner[token] = idx if token_owner.get(token, idx) == idx else None
+
+        self.full_aliases = dict(alias_to_entry)
+        self.token_aliases = {t: i for t, i in token_owner.items() if i is not None and t not in alias_to_entry}
+        all_aliases = list(self.full_aliases) + list(self.token_aliases)
+        self.pattern = _compile_alternation(all_aliases) if all_aliases else None
+
+    @staticmethod
+    def _summarise(scheme: dict, max_chars: int = 400) -> str:
+        lines = scheme.get("lines") or (scheme.get("content") or "").split("\n")
+        body = " ".join(line.strip() for line in lines[1:4] if line.strip())
+        return body[:max_chars].rstrip() + ("..." if len(body) > max_chars else "")
+
+    def lookup(self, message: str) -> Optional[dict]:
+        """Best scheme entry for the message, with a confidence score, or None."""
+        if not self.pattern:
+            return None
+        best = None
+        for match in self.pattern.finditer((message or "").lower()):
+            alias = match.group(0)
+            if alias in self.full_aliases:
+                candidate = (0.95, self.full_aliases[alias])
+            else:
+                candidate = (0.85, self.token_aliases[alias])
+            if best is None or candidate[0] > best[0]:
+                best = candidate
+        if best is None:
+            return None
+        confidence, idx = best
+        return {**self.entries[idx], "confidence": confidence}
+
+
+def answer_from_templates(classification: dict, faq: FaqStore, message: str,
+                          offer: Optional[dict] = None) -> Optional[dict]:
+    """
+    Tries to answer without the LLM. Returns {"message", "confidence", "source"} or None.
+    Only factual questions above FAQ_CONFIDENCE_THRESHOLD qualify.
+    """
+    intent = classification.get("intent")
+
+    # 1. A specific scheme is named and the user is asking what it is (not its rate, eligibility or documents)
+    asks_specific = SPECIFIC_QUESTION_INTENTS & set(classification.get("matches") or {})
+    if (classification.get("is_question") and not asks_specific
+            and intent in (INTENT_SCHEME_INFO, INTENT_PRODUCT_ADVICE, None)):
+        entry = faq.lookup(message)
+        if entry and entry["confidence"] >= FAQ_CONFIDENCE_THRESHOLD and entry["summary"]:
+            tab = f" ({entry['tab']})" if entry["tab"] else ""
+            return {
+                "message": (
+                    f"{entry['scheme_name']}{tab}: {entry['summary']}\n\n"
+                    "If you'd like, I can also show you what you're eligible for with us right away - "
+                    "just say 'apply for a loan'."
+                ),
+                "confidence": entry["confidence"],
+                "source": "scheme_faq",
+            }
+
+    if classification.get("confidence", 0.0) < FAQ_CONFIDENCE_THRESHOLD:
+        return None
+
+    # 2. Rates for a customer who already has an offer on file
+    if intent == INTENT_INTEREST_RATE and offer and offer.get("interest_options"):
+        return {
+            "message": (
+                f"Your pre-approved offer comes with these interest options: "
+                f"{', '.join(offer['interest_options'])}. The final rate depends on your credit profile."
+            ),
+            "confidence": classification["confidence"],
+            "source": "offer_faq",
+        }
+
+    # 3. Documents checklist
+    if intent == INTENT_DOCUMENTS:
+        return {
+            "message": (
+                "To apply you'll need your KYC documents (Aadhaar/PAN) and a recent salary slip. "
+                "For larger amounts we may also ask for a recent bank statement."
+            ),
+            "confidence": classification["confidence"],
+            "source": "static_faq",
+        }
+    return None
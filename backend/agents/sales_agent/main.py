@@ -4,6 +4,7 @@ import logging
 import json
 import os
 import asyncio
+import sys
 import google.generativeai as genai
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
@@ -11,7 +12,16 @@ from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 import psycopg2
 from psycopg2.extras import RealDictCursor
-from typing import Optional
+from typing import Optional, List
+from prompt_cache import PromptPrefixCache
+from intent_classifier import (
+    IntentClassifier, FaqStore, GENERAL_INTENTS, INTENT_SCHEME_INFO, load_intent_synonyms, answer_from_templates
+)
+from scheme_lookup import SchemeCatalogue, parse_filter_query
+
+# Batch ID validation is shared with the mock services (backend/mock_services/mock_db.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "mock_services"))
+import mock_db
 
 # --- Basic Configuration ---
 # Load .env relative to this file's location
@@ -40,15 +50,46 @@ else:
     except Exception as e:
         logger.error(f"Failed to configure Google Generative AI: {e}")
 
+SALES_MODEL_NAME = os.getenv("SALES_MODEL_NAME", "gemini-2.5-flash-preview-09-2025")
+PROMPT_CACHE_TTL_SECONDS = int(os.getenv("SALES_PROMPT_CACHE_TTL_SECONDS", "3600"))
+# How long a replaced provider cache outlives its successor (in-flight requests may still use it)
+PROMPT_CACHE_RELEASE_GRACE_SECONDS = float(os.getenv("SALES_PROMPT_CACHE_RELEASE_GRACE_SECONDS", "300"))
+USE_PROVIDER_CONTEXT_CACHE = os.getenv("SALES_PROVIDER_CONTEXT_CACHE", "true").lower() == "true"
+
 # --- Global HTTP Client ---
 app_http_client = None
 
+# Long-lived Gemini model bound to the static prompt prefix
+prompt_cache = PromptPrefixCache(
+    SALES_MODEL_NAME,
+    ttl_seconds=PROMPT_CACHE_TTL_SECONDS,
+    use_provider_cache=USE_PROVIDER_CONTEXT_CACHE,
+    release_grace_seconds=PROMPT_CACHE_RELEASE_GRACE_SECONDS
+)
+
+# --- Routing: compiled intent classifier + FAQ store (built once at startup) ---
+intent_classifier = IntentClassifier(load_intent_synonyms())
+faq_store = FaqStore([])
+scheme_catalogue = None  # Structured catalogue for filter queries (optional)
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    global app_http_client
+    global app_http_client, faq_store, scheme_catalogue
     app_http_client = httpx.AsyncClient()
     logger.info("Sales Agent HTTP client started.")
+    faq_store = FaqStore(load_schemes_data() or [])
+    logger.info(f"FAQ store ready with {len(faq_store.entries)} scheme entries.")
+    scheme_catalogue = SchemeCatalogue.load(SCHEME_CATALOGUE_PATH)
+    if scheme_catalogue:
+        logger.info(f"Scheme catalogue v{scheme_catalogue.version} loaded ({len(scheme_catalogue.schemes)} schemes).")
+    if GOOGLE_API_KEY:
+        # Warm up: register the static prefix once before the first customer query
+        try:
+            await asyncio.to_thread(prompt_cache.get_model, *get_static_prompt_prefix_versioned())
+        except Exception as e:
+            logger.error(f"Prompt prefix warm-up failed: {e}")
     yield
+    await asyncio.to_thread(prompt_cache.close)
     await app_http_client.close()
     logger.info("Sales Agent HTTP client stopped.")
 
@@ -59,6 +100,11 @@ class SalesRequest(BaseModel):
     customer_id: str
     user_message: Optional[str] = None
 
+class BatchOfferRequest(BaseModel):
+    customer_ids: List[str]
+
+MAX_BATCH_OFFER_IDS = int(os.getenv("MAX_BATCH_OFFER_IDS", "5000"))
+
 # --- Database Helper ---
 def get_db_connection():
     try:
@@ -68,22 +114,62 @@ def get_db_connection():
         logger.error(f"Sales Agent DB Connection Error: {e}")
         return None
 
+def fetch_offers_batch(customer_ids: List[str]) -> dict:
+    """
+    Resolves pre-approved offers for many customers with ONE set-based query.
+    Returns {cust_id: {"pre_approved_limit", "interest_options"}} for customers with an offer.
+    """
+    conn = get_db_connection()
+    if not conn:
+        raise HTTPException(status_code=503, detail="Database unavailable")
+
+    cursor = None
+    try:
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT cust_id, pre_approved_limit, interest_options FROM customers "
+            "WHERE cust_id = ANY(%s) AND pre_approved_limit IS NOT NULL",
+            (customer_ids,)
+        )
+        return {
+            cust_id: {"pre_approved_limit": limit, "interest_options": options or []}
+            for cust_id, limit, options in cursor.fetchall()
+        }
+    except psycopg2.Error as e:
+        logger.error(f"DB Error fetching batch offers: {e}")
+        raise HTTPException(status_code=500, detail="Database query error")
+    finally:
+        if cursor: cursor.close()
+        conn.close()
+
 # --- NEW: Helper to Load Schemes Data ---
+# Path: backend/agents/sales_agent/ -> go up 2 levels -> scrappers/data/jansamarth_schemes.json
+SCHEMES_PATH = os.path.abspath(os.path.join(
+    os.path.dirname(__file__), '..', '..', 'scrappers', 'data', 'jansamarth_schemes.json'
+))
+
+# Built by scrappers/scheme_catalogue.py from the raw scrape
+SCHEME_CATALOGUE_PATH = os.path.join(os.path.dirname(SCHEMES_PATH), 'scheme_catalogue.json')
+
+def load_schemes_data() -> Optional[list]:
+    """Loads the raw scraped schemes list. Returns None if the file is missing or unreadable."""
+    if not os.path.exists(SCHEMES_PATH):
+        logger.warning(f"Schemes data not found at: {SCHEMES_PATH}")
+        return None
+    try:
+        with open(SCHEMES_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        logger.error(f"Error reading schemes file: {e}")
+        return None
+
 def get_schemes_context():
     """Reads the scraped schemes JSON and formats it for the LLM."""
-    # Path: backend/agents/sales_agent/ -> go up 2 levels -> scrapers/data/janasamarth_schemes.json
-    current_dir = os.path.dirname(__file__)
-    schemes_path = os.path.join(current_dir, '..', '..', 'scrappers', 'data', 'jansamarth_schemes.json')
-    schemes_path = os.path.abspath(schemes_path)
-
-    if not os.path.exists(schemes_path):
-        logger.warning(f"Schemes data not found at: {schemes_path}")
+    schemes = load_schemes_data()
+    if schemes is None:
         return "No specific government scheme data available."
 
     try:
-        with open(schemes_path, 'r', encoding='utf-8') as f:
-            schemes = json.load(f)
-        
         context_text = "GOVERNMENT SCHEMES & LOAN INFORMATION:\n"
         for scheme in schemes:
             name = scheme.get("scheme_name", "Unknown Scheme")
@@ -96,17 +182,32 @@ def get_schemes_context():
         logger.error(f"Error reading schemes file: {e}")
         return "Error loading scheme data."
 
-# --- LLM Helper Function ---
-async def get_llm_sales_response(user_query: str, customer_id: str) -> str:
-    """Calls Gemini for general queries, injecting scheme data."""
-    if not GOOGLE_API_KEY:
-        return "I can primarily help with pre-approved personal loan offers. Please ask specifically about those."
+def format_scheme_list(schemes: list) -> str:
+    """Plain-text summary of catalogue matches for the chat reply."""
+    if not schemes:
+        return ("I couldn't find a government scheme matching that exactly. "
+                "Tell me a bit more about what you need the loan for and I'll suggest the best option.")
+    lines = [f"Here are {len(schemes)} schemes that match what you're looking for:"]
+    for scheme in schemes:
+        amount = f" - loans up to Rs. {scheme['max_amount']:,}" if scheme.get("max_amount") else ""
+        lines.append(f"{scheme['name']}{amount}")
+    lines.append("Would you like details on any of these, or shall we check your personalised offer?")
+    return "\n".join(lines)
 
-    # 1. Load the Knowledge Base
-    schemes_context = get_schemes_context()
+# --- Prompt Construction (static prefix + dynamic suffix) ---
+_static_prefix_cache = {"mtime": None, "prefix": None}
+
+def get_static_prompt_prefix() -> str:
+    """
+    Instructions + scheme catalogue. Identical for every request, so it is built once
+    and only rebuilt when the schemes file changes on disk.
+    """
+    mtime = os.path.getmtime(SCHEMES_PATH) if os.path.exists(SCHEMES_PATH) else None
+    if _static_prefix_cache["prefix"] is not None and _static_prefix_cache["mtime"] == mtime:
+        return _static_prefix_cache["prefix"]
 
-    # 2. Inject into System Prompt
-    system_prompt = f"""
+    schemes_context = get_schemes_context()
+    prefix = f"""
     You are LoanBot, a friendly, persuasive, and knowledgeable loan sales executive for our NBFC.
     
     ### KNOWLEDGE BASE (GOVERNMENT SCHEMES):
@@ -118,15 +219,31 @@ async def get_llm_sales_response(user_query: str, customer_id: str) -> str:
     3. **Sell:** Highlight the benefits of our NBFC (quick process, competitive rates) even when discussing government schemes.
     4. **Guide:** Gently encourage them to proceed with a specific application ('apply for a loan') to see personalized details.
     5. **Current Info:** Today's date is October 29, 2025. Use general knowledge for market conditions.
-    
-    The user (Customer ID: {customer_id}) is asking: '{user_query}'
     """
+    _static_prefix_cache.update(mtime=mtime, prefix=prefix)
+    return prefix
+
+def get_static_prompt_prefix_versioned():
+    """(prefix, version) - the schemes file mtime lets the prompt cache skip re-hashing."""
+    prefix = get_static_prompt_prefix()
+    return prefix, ("schemes", _static_prefix_cache["mtime"])
+
+def build_dynamic_suffix(user_query: str, customer_id: str) -> str:
+    """The only per-request part of the prompt."""
+    return f"The user (Customer ID: {customer_id}) is asking: '{user_query}'"
+
+# --- LLM Helper Function ---
+async def get_llm_sales_response(user_query: str, customer_id: str) -> str:
+    """Calls Gemini for general queries. The scheme data lives in the cached prompt prefix."""
+    if not GOOGLE_API_KEY:
+        return "I can primarily help with pre-approved personal loan offers. Please ask specifically about those."
 
     try:
-        model = genai.GenerativeModel(model_name='gemini-2.5-flash-preview-09-2025')
-        logger.info(f"Calling Gemini with scheme data for query: {user_query}")
+        # Hot path: no JSON parsing, no model construction - reuses the long-lived model
+        model = await asyncio.to_thread(prompt_cache.get_model, *get_static_prompt_prefix_versioned())
+        logger.info(f"Calling Gemini ({prompt_cache.mode} prefix) for query: {user_query}")
 
-        response = await model.generate_content_async(system_prompt)
+        response = await model.generate_content_async(build_dynamic_suffix(user_query, customer_id))
 
         if response and hasattr(response, 'text') and response.text:
             return response.text
@@ -169,15 +286,44 @@ async def handle_sales(request: SalesRequest):
             if cursor: cursor.close()
             if conn: conn.close()
 
+    # --- Intent Routing (single compiled pass over the message) ---
+    classification = intent_classifier.classify(user_message)
+    logger.info(f"Intent: {classification['intent']} (confidence {classification['confidence']})")
+
+    # High-confidence factual questions are answered from templates, no LLM call
+    if user_message:
+        fast_answer = answer_from_templates(classification, faq_store, user_message, pre_approved_offer)
+        if fast_answer:
+            logger.info(f"Answered from {fast_answer['source']} without LLM.")
+            return {
+                "agent": "Sales Agent",
+                "response_type": "faq",
+                "message": fast_answer["message"],
+                "intent": classification["intent"],
+                "confidence": fast_answer["confidence"]
+            }
+
+    # Filter queries ("schemes for business under 10 lakh") -> in-memory catalogue lookup.
+    # Any scheme mention counts, not only a top intent: "business loan schemes" ties with product_advice.
+    if scheme_catalogue and INTENT_SCHEME_INFO in classification["matches"]:
+        filters = parse_filter_query(user_message)
+        if filters:
+            matches = scheme_catalogue.filter(**filters)
+            logger.info(f"Catalogue lookup {filters} -> {len(matches)} schemes, no LLM.")
+            return {
+                "agent": "Sales Agent",
+                "response_type": "scheme_list",
+                "message": format_scheme_list(matches),
+                "filters": filters,
+                "schemes": matches
+            }
+
     use_llm = False
     if not pre_approved_offer:
         use_llm = True
-    else:
-        # Enhanced keyword list to catch scheme-related questions
-        general_query_keywords = ["car", "home", "market", "rates", "advice", "should i", "recommend", "business", "type", "options", "compare", "scheme", "government", "subsidy", "exporter"]
-        if any(keyword in user_message.lower() for keyword in general_query_keywords):
-            logger.info("Offer exists, but user asked general/scheme query. Using LLM.")
-            use_llm = True
+    elif classification["intent"] in GENERAL_INTENTS:
+        logger.info("Offer exists, but user asked general/scheme query. Using LLM.")
+        use_llm = True
 
     # --- Return Offer OR Call LLM ---
     if pre_approved_offer and not use_llm:
@@ -198,6 +344,28 @@ async def handle_sales(request: SalesRequest):
             "message": llm_response_text
         }
 
+# --- Bulk Offer Endpoint (no LLM) ---
+@app.post("/sales/offers/batch")
+def handle_sales_batch(request: BatchOfferRequest):
+    """
+    Resolves offers for many customers in one round trip (dashboards, campaign jobs).
+    Deterministic DB lookup only - the LLM is never called here.
+    """
+    customer_ids = mock_db.batch_ids(request.customer_ids, MAX_BATCH_OFFER_IDS)
+    logger.info(f"Batch offer request for {len(customer_ids)} customers.")
+
+    offers = fetch_offers_batch(customer_ids) if customer_ids else {}
+    return {
+        "agent": "Sales Agent",
+        "response_type": "offer_batch",
+        "offers": offers,
+        "not_found": [cid for cid in customer_ids if cid not in offers]
+    }
+
+@app.get("/metrics/prompt-cache")
+def prompt_cache_metrics():
+    return prompt_cache.stats()
+
 @app.get("/")
 def root():
     return {"message": "Sales Agent (LLM + Schemes) is live!"}
@@ -0,0 +1,146 @@
+"""
+Prompt-prefix reuse for Sales Agent Gemini calls.
+
+The sales prompt is a large static prefix (instructions + scheme catalogue) followed
+by a short per-request suffix (customer id + query). This module keeps ONE long-lived
+model bound to the prefix:
+  * provider mode: the prefix is registered once with Gemini context caching and the
+    model is created from the cached content, so only the suffix goes on the wire.
+  * local mode: the model is created with the prefix as its system instruction and
+    reused. Used when provider caching is disabled/unavailable, and in tests via
+    `model_factory`.
+The model is rebuilt only when the prefix changes or the provider cache nears its TTL.
+Change detection hashes the prefix only when the caller's `version` (e.g. the schemes
+file mtime) changes. A replaced provider cache is deleted only after `release_grace_seconds`,
+because requests already holding the old model may still be generating against it.
+"""
+import datetime
+import hashlib
+import logging
+import threading
+import time
+from typing import Callable, Optional
+
+import google.generativeai as genai
+
+logger = logging.getLogger(__name__)
+
+
+class PromptPrefixCache:
+    def __init__(self, model_name: str, ttl_seconds: int = 3600, use_provider_cache: bool = True,
+                 model_factory: Optional[Callable[[str], object]] = None, release_grace_seconds: float = 300):
+        self.model_name = model_name
+        self.ttl_seconds = ttl_seconds
+        self.use_provider_cache = use_provider_cache
+        self.release_grace_seconds = release_grace_seconds
+        # Local stand-in: called with the prefix, returns an object with generate_content_async
+        self.model_factory = model_factory
+
+        self._lock = threading.Lock()
+        self._model = None
+        self._prefix_key = None
+        self._built_at = 0.0
+        self._provider_cache = None
+        self._retired = []              # (retired_at, provider cache) awaiting delayed delete
+        self._digest_version = None     # (version, sha256) of the last prefix hashed
+        self.mode = None
+        self.hits = 0
+        self.misses = 0
+
+    def _is_fresh(self, prefix_key: str) -> bool:
+        if self._model is None or prefix_key != self._prefix_key:
+            return False
+        # Refresh provider caches a little before they expire server-side
+        if self._provider_cache is not None:
+            return (time.monotonic() - self._built_at) < self.ttl_seconds * 0.9
+        return True
+
+    def _prefix_digest(self, prefix: str, version) -> str:
+        """sha256 of the prefix, recomputed only when `version` changes (None = always hash)."""
+        if version is not None and self._digest_version and self._digest_version[0] == version:
+            return self._digest_version[1]
+        digest = hashlib.sha256(prefix.encode("utf-8")).hexdigest()
+        self._digest_version = (version, digest)
+        return digest
+
+    def get_model(self, prefix: str, version=None):
+        """
+        Returns the long-lived model bound to `prefix`, rebuilding only when needed.
+        `version` identifies the prefix's source (e.g. file mtime); while it is unchanged
+        the prefix is not re-hashed.
+        """
+        with self._lock:
+            prefix_key = self._prefix_digest(prefix, version)
+            self._purge_retired()
+            if self._is_fresh(prefix_key):
+                self.hits += 1
+                return self._model
+            self.misses += 1
+            self._retire_provider_cache()
+            self._model = self._build(prefix)
+            self._prefix_key = prefix_key
+            self._built_at = time.monotonic()
+            logger.info(f"Prompt prefix model built ({self.mode}, {len(prefix)} chars).")
+            return self._model
+
+    def _build(self, prefix: str):
+        if self.model_factory is not None:
+            self.mode = "local-stub"
+            return self.model_factory(prefix)
+
+        if self.use_provider_cache:
+            try:
+                self._provider_cache = genai.caching.CachedContent.create(
+                    model=self.model_name,
+                    display_name="sales-agent-prefix",
+                    system_instruction=prefix,
+                    ttl=datetime.timedelta(seconds=self.ttl_seconds),
+                )
+                self.mode = "provider"
+                return genai.GenerativeModel.from_cached_content(cached_content=self._provider_cache)
+            except Exception as e:
+                # e.g. prefix below the provider's minimum cacheable size, or model without caching
+                logger.warning(f"Provider context caching unavailable, using local prefix: {e}")
+                self._provider_cache = None
+
+        self.mode = "local"
+        return genai.GenerativeModel(model_name=self.model_name, system_instruction=prefix)
+
+    def _retire_provider_cache(self):
+        """Detaches the current provider cache; it is deleted once the grace period has passed."""
+        if self._provider_cache is None:
+            return
+        self._retired.append((time.monotonic(), self._provider_cache))
+        self._provider_cache = None
+
+    def _purge_retired(self, force: bool = False):
+        cutoff = time.monotonic() - self.release_grace_seconds
+        keep = []
+        for retired_at, cache in self._retired:
+            if not force and retired_at > cutoff:
+                keep.append((retired_at, cache))
+                continue
+            try:
+                cache.delete()
+            except Exception as e:
+                logger.warning(f"Failed to delete provider prompt cache: {e}")
+        self._retired = keep
+
+    def close(self):
+        """Shutdown: no requests remain, so every provider cache is deleted now."""
+        with self._lock:
+            self._retire_provider_cache()
+            self._purge_retired(force=True)
+            self._model = None
+            self._prefix_key = None
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "mode": self.mode,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "prefix_sha256": self._prefix_key,
+            "retired_provider_caches": len(self._retired),
+        }
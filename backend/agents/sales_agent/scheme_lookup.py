@@ -0,0 +1,100 @@
+"""
+In-memory lookup over the structured scheme catalogue (scrappers/data/scheme_catalogue.json).
+
+Answers filter queries such as "schemes for business under ₹10 lakh" without the LLM:
+purpose filters use the prebuilt purpose index, amount bounds bisect the
+max_amount-sorted index.
+"""
+import bisect
+import json
+import logging
+import os
+import re
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Query-side purpose words -> catalogue purpose keys (English + Hinglish)
+QUERY_PURPOSES = {
+    "business": ["business", "msme", "shop", "dukaan", "vyapar", "dhandha", "startup", "enterprise"],
+    "agriculture": ["agri", "agriculture", "farm", "farming", "kisan", "kheti", "dairy", "tractor"],
+    "education": ["education", "study", "studies", "student", "padhai", "college"],
+    "housing": ["housing", "house", "home", "ghar", "awas"],
+    "livelihood": ["livelihood", "self help group", "shg", "street vendor", "artisan"],
+    "export": ["export", "exporter"],
+    "energy": ["solar", "rooftop", "renewable"],
+}
+_PURPOSE_PATTERN = re.compile(
+    r"\b(" + "|".join(sorted((re.escape(w) for ws in QUERY_PURPOSES.values() for w in ws), key=len, reverse=True)) + r")\b",
+    re.IGNORECASE,
+)
+_WORD_TO_PURPOSE = {w: p for p, ws in QUERY_PURPOSES.items() for w in ws}
+
+_BOUND_PATTERN = re.compile(
+    r"\b(under|below|upto|up to|less than|within|max|above|over|more than|at least|minimum)\s*"
+    r"(?:₹|rs\.?|inr)?\s*([\d,]+(?:\.\d+)?)\s*(lakhs?|lacs?|l|crores?|cr|k|thousand)?\b",
+    re.IGNORECASE,
+)
+_UNITS = {"lakh": 1e5, "lac": 1e5, "l": 1e5, "crore": 1e7, "cr": 1e7, "k": 1e3, "thousand": 1e3}
+_UPPER_WORDS = {"under", "below", "upto", "up to", "less than", "within", "max"}
+
+
+def parse_filter_query(message: str) -> dict:
+    """Extracts {"purposes", "max_amount_le", "max_amount_ge"} from free text. Empty dict if none."""
+    text = (message or "").lower()
+    filters = {}
+
+    purposes = sorted({_WORD_TO_PURPOSE[m.lower()] for m in _PURPOSE_PATTERN.findall(text)})
+    if purposes:
+        filters["purposes"] = purposes
+
+    for word, number, unit in _BOUND_PATTERN.findall(text):
+        try:
+            amount = float(number.replace(',', ''))
+        except ValueError:
+            continue
+        if unit:
+            amount *= _UNITS.get(unit.lower().rstrip('s'), 1)
+        key = "max_amount_le" if word in _UPPER_WORDS else "max_amount_ge"
+        filters[key] = int(amount)
+    return filters
+
+
+class SchemeCatalogue:
+    def __init__(self, catalogue: dict):
+        self.version = catalogue.get("version")
+        self.schemes: List[dict] = catalogue.get("schemes", [])
+        indexes = catalogue.get("indexes", {})
+        self.purpose_index = {p: set(ids) for p, ids in indexes.get("purpose", {}).items()}
+        self.amount_order: List[int] = indexes.get("by_max_amount", [])
+        self.amount_keys = [self.schemes[i]["max_amount"] for i in self.amount_order]
+
+    @classmethod
+    def load(cls, path: str) -> Optional["SchemeCatalogue"]:
+        if not os.path.exists(path):
+            logger.warning(f"Scheme catalogue not found at: {path}")
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return cls(json.load(f))
+        except Exception as e:
+            logger.error(f"Error loading scheme catalogue: {e}")
+            return None
+
+    def filter(self, purposes: Optional[List[str]] = None, max_amount_le: Optional[int] = None,
+               max_amount_ge: Optional[int] = None, limit: int = 10) -> List[dict]:
+        candidates = None
+        if purposes:
+            candidates = set().union(*(self.purpose_index.get(p, set()) for p in purposes))
+
+        if max_amount_le is not None or max_amount_ge is not None:
+            lo = bisect.bisect_left(self.amount_keys, max_amount_ge) if max_amount_ge is not None else 0
+            hi = bisect.bisect_right(self.amount_keys, max_amount_le) if max_amount_le is not None else len(self.amount_keys)
+            in_range = set(self.amount_order[lo:hi])
+            candidates = in_range if candidates is None else candidates & in_range
+
+        if candidates is None:
+            return []
+        # Largest loan first - most useful for a sales pitch
+        ordered = sorted(candidates, key=lambda i: -(self.schemes[i]["max_amount"] or 0))
+        return [self.schemes[i] for i in ordered[:limit]]
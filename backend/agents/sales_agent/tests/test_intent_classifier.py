@@ -0,0 +1,37 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from intent_classifier import (  # noqa: E402
+    DEFAULT_INTENT_SYNONYMS, FaqStore, IntentClassifier, answer_from_templates,
+)
+
+SCHEMES = [{
+    "scheme_name": "Pradhan Mantri MUDRA Yojana (PMMY)",
+    "tab": "Business",
+    "lines": ["Pradhan Mantri MUDRA Yojana (PMMY)", "Loans up to 10 lakh for micro enterprises."],
+}]
+
+classifier = IntentClassifier(DEFAULT_INTENT_SYNONYMS)
+faq = FaqStore(SCHEMES)
+
+
+def answer(message):
+    return answer_from_templates(classifier.classify(message), faq, message)
+
+
+def test_scheme_question_gets_template_answer():
+    result = answer("what is mudra yojana (pmmy)?")
+    assert result["source"] == "scheme_faq"
+
+
+def test_rate_question_about_scheme_goes_to_llm():
+    classification = classifier.classify("what is the interest rate for mudra?")
+    assert "interest_rate" in classification["matches"]
+    assert answer("what is the interest rate for mudra?") is None
+
+
+def test_eligibility_and_documents_questions_about_scheme_go_to_llm():
+    assert answer("what is the eligibility for pmmy?") is None
+    assert answer("what is the documents required for pmmy?") is None
@@ -3,6 +3,7 @@ import httpx
 import logging
 import json
 import os
+import sys
 import asyncio
 import datetime
 from fastapi import FastAPI, HTTPException
@@ -14,6 +15,9 @@ import psycopg2
 from psycopg2.extras import RealDictCursor
 from typing import Optional, List
 from pymongo import MongoClient
+# Shared agent helpers live one level up (backend/agents/http_cache.py)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from http_cache import CachingTransport
 import datetime
 
 
@@ -38,13 +42,15 @@ CRM_SERVICE_URL = "http://127.0.0.1:9001/crm"
 OUTPUT_DIR = "../../sanction_letters/"
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
+# CRM reads go through the shared ETag-revalidating cache (same transport as the verification agent)
+crm_cache_transport = CachingTransport()
 app_http_client = None
 mongo_client = None
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     global app_http_client, mongo_client
-    app_http_client = httpx.AsyncClient()
+    app_http_client = httpx.AsyncClient(transport=crm_cache_transport)
     
     try:
         mongo_client = MongoClient(MONGO_URI)
@@ -614,6 +620,9 @@ async def export_loan_as_json(loan_id: int):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/metrics/crm-cache")
+def crm_cache_metrics(): return crm_cache_transport.stats()
+
 @app.get("/")
 def root():
     return {"message": "Sanction Agent is live"}
@@ -0,0 +1,100 @@
+"""
+Amortisation schedule engine.
+
+Schedules are computed in closed form over the whole tenure at once (no month-by-month
+Python loop): the outstanding balance after k payments is
+    B_k = P(1+r)^k - EMI((1+r)^k - 1)/r
+so interest and principal for every month fall out of array arithmetic. Many loans are
+processed as a padded (loans x months) matrix, a chunk of loans at a time, and emitted
+as CSV or NDJSON text blocks so callers can stream without holding every row in memory.
+"""
+import csv
+import io
+import json
+from typing import Iterator, List
+
+import numpy as np
+
+from batch_engine import calculate_emi_vec
+
+SCHEDULE_COLUMNS = ["loan_id", "month", "emi", "interest", "principal", "balance"]
+LOANS_PER_CHUNK = 500
+
+
+def schedule_matrix(principals, annual_rates, tenures) -> dict:
+    """
+    Returns 2-D arrays (loans x max_tenure) for emi/interest/principal/balance plus a
+    `mask` of valid months. Final month absorbs rounding so every balance ends at 0.
+    """
+    P = np.asarray(principals, dtype=np.float64)[:, None]
+    r = (np.asarray(annual_rates, dtype=np.float64) / 1200.0)[:, None]
+    n = np.asarray(tenures, dtype=np.int64)[:, None]
+    months = np.arange(1, max(int(n.max(initial=0)), 0) + 1)[None, :]
+
+    emi = calculate_emi_vec(P, r * 1200.0, n)
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        growth = np.power(1.0 + r, months)
+        balance = np.where(r == 0, P - emi * months, P * growth - emi * (growth - 1.0) / r)
+    balance_prev = np.concatenate([np.broadcast_to(P, (P.shape[0], 1)), balance[:, :-1]], axis=1)
+
+    interest = balance_prev * r
+    principal_paid = emi - interest
+
+    last = months == n
+    principal_paid = np.where(last, balance_prev, principal_paid)
+    emi_row = np.where(last, balance_prev + interest, np.broadcast_to(emi, balance.shape))
+    balance = np.where(last, 0.0, balance)
+
+    return {
+        "month": np.broadcast_to(months, balance.shape),
+        "emi": emi_row,
+        "interest": interest,
+        "principal": principal_paid,
+        "balance": np.maximum(balance, 0.0),
+        "mask": months <= n,
+    }
+
+
+def schedule_summary(principal: float, annual_rate: float, tenure: int) -> dict:
+    m = schedule_matrix([principal], [annual_rate], [tenure])
+    return {
+        "emi": round(float(calculate_emi_vec(principal, annual_rate, tenure)), 2),
+        "total_interest": round(float(m["interest"][m["mask"]].sum()), 2),
+        "total_payment": round(float(m["emi"][m["mask"]].sum()), 2),
+        "months": int(tenure),
+    }
+
+
+def _rows(loan_ids: List[str], m: dict):
+    """Yields (loan_id, month, emi, interest, principal, balance) for valid cells, 2-dp."""
+    mask = m["mask"]
+    loan_idx, _ = np.nonzero(mask)
+    cols = [np.round(m[c][mask], 2).tolist() for c in ("emi", "interest", "principal", "balance")]
+    months = m["month"][mask].tolist()
+    ids = [loan_ids[i] for i in loan_idx.tolist()]
+    return zip(ids, months, *cols)
+
+
+def _csv_block(rows) -> str:
+    """CSV text for `rows`, quoting loan IDs that contain commas, quotes or newlines."""
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerows(rows)
+    return buffer.getvalue()
+
+
+def stream_schedules(loan_ids: List[str], principals, annual_rates, tenures,
+                     fmt: str = "csv", chunk_size: int = LOANS_PER_CHUNK) -> Iterator[str]:
+    """Generator of CSV/NDJSON text blocks, one block per chunk of loans."""
+    if fmt == "csv":
+        yield _csv_block([SCHEDULE_COLUMNS])
+
+    for start in range(0, len(loan_ids), chunk_size):
+        stop = start + chunk_size
+        m = schedule_matrix(principals[start:stop], annual_rates[start:stop], tenures[start:stop])
+        rows = _rows(loan_ids[start:stop], m)
+        if fmt == "csv":
+            yield _csv_block((lid, mon, f"{e:.2f}", f"{i:.2f}", f"{p:.2f}", f"{b:.2f}") for lid, mon, e, i, p, b in rows)
+        else:
+            yield "".join(
+                json.dumps(dict(zip(SCHEDULE_COLUMNS, row)), separators=(",", ":")) + "\n" for row in rows
+            )
@@ -0,0 +1,135 @@
+"""
+Vectorised risk engine for portfolio-scale underwriting.
+
+Same policy as the scalar path in main.py (calculate_risk_profile / calculate_emi /
+underwrite), expressed as NumPy array operations so a whole book is evaluated in a
+handful of passes instead of one Python call per loan. Bands, spreads, tenure caps
+and the limit/FOIR rules come from the active CompiledPolicy (risk_policy.py).
+"""
+import numpy as np
+
+# Compact decision codes (index into DECISION_REASONS)
+APPROVED, SCORE_TOO_LOW, EXCEEDS_LIMIT, EMI_TOO_HIGH = 0, 1, 2, 3
+DECISION_REASONS = np.array(["approved", "score_below_minimum", "exceeds_eligibility_limit", "emi_exceeds_foir"])
+
+
+def calculate_emi_vec(principal, annual_rate, n_months) -> np.ndarray:
+    """Vectorised EMI. Zero-rate loans are straight-line; non-positive tenures give 0."""
+    principal = np.asarray(principal, dtype=np.float64)
+    r = np.asarray(annual_rate, dtype=np.float64) / 1200.0
+    n = np.asarray(n_months, dtype=np.float64)
+
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        growth = np.power(1.0 + r, n)
+        emi = principal * r * growth / (growth - 1.0)
+        emi = np.where(r == 0, principal / n, emi)
+    return np.where((n <= 0) | (r < 0), 0.0, emi)
+
+
+def evaluate_batch(policy, credit_scores, requested_amounts, pre_approved_limits,
+                   monthly_salaries, interest_rates, tenures) -> dict:
+    """
+    Evaluates every application in one pass. Returns column arrays:
+    decision (code), band, final_rate, final_tenure, final_emi, approved_amount.
+    """
+    scores = np.asarray(credit_scores, dtype=np.int64)
+    amounts = np.asarray(requested_amounts, dtype=np.float64)
+    limits = np.asarray(pre_approved_limits, dtype=np.float64)
+    salaries = np.asarray(monthly_salaries, dtype=np.float64)
+    rates = np.asarray(interest_rates, dtype=np.float64)
+    tenures = np.asarray(tenures, dtype=np.int64)
+
+    band = policy.band_indices(scores)
+    eligible = band >= 0
+    safe_band = np.where(eligible, band, 0)
+
+    final_rate = np.round(rates + policy.spreads[safe_band], 2)
+    final_tenure = np.minimum(tenures, policy.max_tenures[safe_band])
+    final_emi = calculate_emi_vec(amounts, final_rate, final_tenure)
+
+    # Same precedence as the scalar endpoint: score -> limit -> affordability
+    decision = np.full(scores.shape, APPROVED, dtype=np.int8)
+    decision[final_emi > salaries * policy.max_foir] = EMI_TOO_HIGH
+    decision[amounts > policy.max_limit_multiplier * limits] = EXCEEDS_LIMIT
+    decision[~eligible] = SCORE_TOO_LOW
+
+    # Below-minimum scores get no terms at all (zeros keep the columns JSON-safe)
+    approved = decision == APPROVED
+    return {
+        "decision": decision,
+        "band": band,
+        "final_rate": np.where(eligible, final_rate, 0.0),
+        "final_tenure": np.where(eligible, final_tenure, 0),
+        "final_emi": np.where(eligible, final_emi, 0.0),
+        "approved_amount": np.where(approved, amounts, 0.0),
+    }
+
+
+# --- Counter-offer solver ---
+COUNTER_OFFER_TENURE_STEP = 12   # offer tenures in whole years
+COUNTER_OFFER_ROUNDING = 1000    # quote amounts in round thousands
+
+
+def max_principal_vec(max_emi, annual_rate, n_months) -> np.ndarray:
+    """Inverse of the EMI formula: largest principal whose EMI is <= max_emi."""
+    max_emi = np.asarray(max_emi, dtype=np.float64)
+    r = np.asarray(annual_rate, dtype=np.float64) / 1200.0
+    n = np.asarray(n_months, dtype=np.float64)
+
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        growth = np.power(1.0 + r, n)
+        principal = max_emi * (growth - 1.0) / (r * growth)
+        principal = np.where(r == 0, max_emi * n, principal)
+    return np.where(n <= 0, 0.0, principal)
+
+
+def counter_offer_grid(policy, credit_score: int, requested_amount: float, pre_approved_limit: float,
+                       monthly_salary: float, interest_rate: float):
+    """
+    Largest affordable principal at the risk-adjusted rate for every permissible tenure,
+    plus an amount x tenure -> EMI grid computed in one broadcast. None if score ineligible.
+    """
+    band = policy.band_index(credit_score)
+    if band < 0:
+        return None
+
+    final_rate = round(interest_rate + float(policy.spreads[band]), 2)
+    max_tenure = int(policy.max_tenures[band])
+    # Whole years up to the cap, plus the cap itself (a 6- or 18-month cap is a permissible tenure too)
+    yearly = np.arange(COUNTER_OFFER_TENURE_STEP, max_tenure + 1, COUNTER_OFFER_TENURE_STEP)
+    tenures = np.unique(np.append(yearly, max_tenure))
+    tenures = tenures[tenures > 0]
+    max_emi = monthly_salary * policy.max_foir
+    policy_cap = min(requested_amount, policy.max_limit_multiplier * pre_approved_limit)
+
+    max_amounts = np.minimum(max_principal_vec(max_emi, final_rate, tenures), policy_cap)
+    max_amounts = np.floor(max_amounts / COUNTER_OFFER_ROUNDING) * COUNTER_OFFER_ROUNDING
+
+    # Amount axis: each tenure's ceiling (+ the capped request), largest first
+    amounts = np.unique(np.append(max_amounts, policy_cap))[::-1]
+    amounts = amounts[amounts > 0]
+    emi_grid = calculate_emi_vec(amounts[:, None], final_rate, tenures[None, :])
+    affordable = emi_grid <= max_emi
+
+    best_offer = None
+    if max_amounts.size and max_amounts.max() > 0:
+        # Largest amount, then the shortest tenure that reaches it (least total interest)
+        best_idx = int(np.flatnonzero(max_amounts == max_amounts.max())[0])
+        best_offer = {
+            "amount": int(max_amounts[best_idx]),
+            "tenure_months": int(tenures[best_idx]),
+            "emi": int(calculate_emi_vec(max_amounts[best_idx], final_rate, tenures[best_idx]))
+        }
+
+    return {
+        "interest_rate": final_rate,
+        "max_emi": int(max_emi),
+        "max_amount_by_tenure": {int(t): int(a) for t, a in zip(tenures, max_amounts)},
+        "best_offer": best_offer,
+        "grid": {
+            "amounts": amounts.astype(np.int64).tolist(),
+            "tenures": tenures.tolist(),
+            "emi": np.round(emi_grid).astype(np.int64).tolist(),
+            "affordable": affordable.tolist()
+        }
+    }
@@ -0,0 +1,243 @@
+"""
+Underwriting benchmark suite with regression thresholds.
+
+Measures:
+  * scalar throughput   - calculate_emi / calculate_risk_profile calls per second
+  * batch throughput    - calculate_emi_vec / evaluate_batch rows per second
+  * end-to-end latency  - POST /underwrite through the real FastAPI app, in-process,
+                          against a stub credit bureau (cold = bureau called, warm = cached)
+
+Results are written as JSON. With a baseline present, any benchmark that is worse than
+baseline by more than its tolerance fails the run (exit code 1), so CI can gate on it.
+
+Usage:
+  python benchmarks/bench_underwriting.py                   # run + compare to baseline.json
+  python benchmarks/bench_underwriting.py --save-baseline   # record this machine's baseline
+  python benchmarks/bench_underwriting.py --tolerance 0.10 --output results.json
+  python benchmarks/bench_underwriting.py --require-baseline  # CI: a missing baseline fails (exit 2)
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+AGENT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, AGENT_DIR)
+
+from batch_engine import calculate_emi_vec, evaluate_batch  # noqa: E402
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+DEFAULT_TOLERANCE = 0.20
+DEFAULT_E2E_TOLERANCE = 0.50  # in-process HTTP latency is noisier than pure compute
+E2E_WARMUP_REQUESTS = 20
+
+
+def _best_rate(fn, units: int, repeats: int) -> float:
+    """Units per second from the fastest of `repeats` runs (least scheduler noise)."""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return units / best
+
+
+def _synthetic_book(n: int, seed: int = 7) -> dict:
+    rng = np.random.default_rng(seed)
+    return {
+        "credit_scores": rng.integers(600, 850, n),
+        "requested_amounts": rng.integers(100_000, 1_000_000, n).astype(float),
+        "pre_approved_limits": rng.integers(200_000, 800_000, n).astype(float),
+        "monthly_salaries": rng.integers(20_000, 150_000, n).astype(float),
+        "interest_rates": rng.uniform(9.0, 14.0, n),
+        "tenures": rng.choice([12, 24, 36, 48, 60], n),
+    }
+
+
+# --- Micro benchmarks ---
+def bench_scalar(main_module, n: int, repeats: int) -> dict:
+    book = _synthetic_book(n)
+    scores = book["credit_scores"].tolist()
+    amounts = book["requested_amounts"].tolist()
+    rates = book["interest_rates"].tolist()
+    tenures = book["tenures"].tolist()
+    policy = main_module.policy_store.get()
+
+    def run_emi():
+        for p, r, t in zip(amounts, rates, tenures):
+            main_module.calculate_emi(p, r, t)
+
+    def run_risk():
+        for s, r, t in zip(scores, rates, tenures):
+            main_module.calculate_risk_profile(s, r, t, policy)
+
+    return {
+        "scalar_calculate_emi": {"value": _best_rate(run_emi, n, repeats), "unit": "calls/s", "higher_is_better": True},
+        "scalar_calculate_risk_profile": {"value": _best_rate(run_risk, n, repeats), "unit": "calls/s", "higher_is_better": True},
+    }
+
+
+def bench_batch(main_module, n: int, repeats: int) -> dict:
+    book = _synthetic_book(n)
+    policy = main_module.policy_store.get()
+    return {
+        "batch_calculate_emi_vec": {
+            "value": _best_rate(lambda: calculate_emi_vec(book["requested_amounts"], book["interest_rates"], book["tenures"]), n, repeats),
+            "unit": "rows/s", "higher_is_better": True,
+        },
+        "batch_evaluate_batch": {
+            "value": _best_rate(lambda: evaluate_batch(policy, *book.values()), n, repeats),
+            "unit": "rows/s", "higher_is_better": True,
+        },
+    }
+
+
+# --- Macro benchmark: /underwrite end to end ---
+def _stub_bureau_transport(httpx):
+    def handler(request):
+        cust_id = request.url.params.get("cust_id", "")
+        score = 650 + (sum(map(ord, cust_id)) % 200)  # deterministic spread across bands
+        return httpx.Response(200, json={"cust_id": cust_id, "score": score})
+    return httpx.MockTransport(handler)
+
+
+async def _underwrite_latencies(main_module, n: int, cold: bool) -> list:
+    import httpx
+
+    transport = httpx.ASGITransport(app=main_module.app)
+    latencies = []
+    # ASGITransport doesn't send lifespan events; run startup/shutdown so the decision log
+    # flusher runs (and is drained on exit) like in the real service
+    async with main_module.app.router.lifespan_context(main_module.app), \
+            httpx.AsyncClient(transport=transport, base_url="http://underwriting") as client:
+        await main_module.app_http_client.aclose()
+        main_module.app_http_client = httpx.AsyncClient(transport=_stub_bureau_transport(httpx))
+        for i in range(-E2E_WARMUP_REQUESTS, n):
+            if cold:
+                main_module.bureau_cache.invalidate()
+            payload = {
+                "customer_id": f"BENCH-{abs(i) % 50}",
+                "requested_loan_amount": 300_000 + (abs(i) % 7) * 50_000,
+                "pre_approved_limit": 400_000,
+                "monthly_salary": 60_000,
+                "interest_rate": 10.5,
+                "loan_tenure_months": 36,
+            }
+            start = time.perf_counter()
+            response = await client.post("/underwrite", json=payload)
+            response.raise_for_status()
+            if i >= 0:
+                latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def bench_endpoint(main_module, n: int) -> dict:
+    results = {}
+    for label, cold in (("cold", True), ("warm", False)):
+        latencies = sorted(asyncio.run(_underwrite_latencies(main_module, n, cold)))
+        results[f"e2e_underwrite_{label}_p50"] = {
+            "value": statistics.median(latencies), "unit": "ms", "higher_is_better": False}
+        results[f"e2e_underwrite_{label}_p95"] = {
+            "value": latencies[int(0.95 * (len(latencies) - 1))], "unit": "ms", "higher_is_better": False}
+    return results
+
+
+# --- Baseline comparison ---
+def compare(results: dict, baseline: dict, default_tolerance: float, e2e_tolerance: float) -> list:
+    """Returns the names of benchmarks that regressed beyond tolerance (empty = pass)."""
+    tolerances = baseline.get("tolerances", {})
+    regressions = []
+    for name, base in baseline.get("results", {}).items():
+        if name not in results:
+            continue
+        current, reference = results[name]["value"], base["value"]
+        tolerance = tolerances.get(name, e2e_tolerance if name.startswith("e2e_") else default_tolerance)
+        if base.get("higher_is_better", True):
+            worse = current < reference * (1 - tolerance)
+        else:
+            worse = current > reference * (1 + tolerance)
+        change = (current - reference) / reference * 100 if reference else 0.0
+        status = "REGRESSION" if worse else "ok"
+        print(f"  {status:<10} {name:<34} {current:>14.2f} {base['unit']:<8} (baseline {reference:.2f}, {change:+.1f}%)")
+        if worse:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Underwriting benchmark suite")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--require-baseline", action="store_true",
+                        help="Fail (exit 2) instead of passing when the baseline file is missing")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed fractional slowdown before failing (per-benchmark overrides in baseline 'tolerances')")
+    parser.add_argument("--e2e-tolerance", type=float, default=DEFAULT_E2E_TOLERANCE)
+    parser.add_argument("--output", help="Write this run's results JSON here")
+    parser.add_argument("--scalar-n", type=int, default=100_000)
+    parser.add_argument("--batch-n", type=int, default=1_000_000)
+    parser.add_argument("--e2e-n", type=int, default=300)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--skip-e2e", action="store_true")
+    args = parser.parse_args()
+
+    os.chdir(AGENT_DIR)
+    # Benchmark decisions must not land in the real audit log
+    os.environ.setdefault("DECISION_LOG_DIR", tempfile.mkdtemp(prefix="bench-decisions-"))
+    import main as main_module  # the real agent module (policy store, endpoints, cache)
+    logging.disable(logging.INFO)  # per-request INFO logs would dominate e2e timings
+
+    results = {}
+    results.update(bench_scalar(main_module, args.scalar_n, args.repeats))
+    results.update(bench_batch(main_module, args.batch_n, args.repeats))
+    if not args.skip_e2e:
+        results.update(bench_endpoint(main_module, args.e2e_n))
+
+    run = {
+        "policy_version": main_module.policy_store.get().version,
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "results": results,
+    }
+    for name, r in results.items():
+        print(f"  {name:<34} {r['value']:>14.2f} {r['unit']}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(run, f, indent=2)
+
+    if args.save_baseline:
+        # Keep hand-tuned per-benchmark tolerances when re-recording
+        if os.path.exists(args.baseline):
+            with open(args.baseline, "r", encoding="utf-8") as f:
+                run["tolerances"] = json.load(f).get("tolerances", {})
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(run, f, indent=2)
+        print(f"✓ Baseline saved to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to record one.")
+        if args.require_baseline:
+            sys.exit(2)
+        return
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    print(f"\nComparing against baseline (policy {baseline.get('policy_version')}):")
+    regressions = compare(results, baseline, args.tolerance, args.e2e_tolerance)
+    if regressions:
+        print(f"\n✗ {len(regressions)} benchmark(s) regressed beyond tolerance: {', '.join(regressions)}")
+        sys.exit(1)
+    print("\n✓ No regressions.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Bounded TTL cache for credit bureau scores with single-flight de-duplication.
+
+- Fresh hits (age < ttl) never touch the bureau.
+- Optional stale-while-revalidate: within `stale_seconds` after expiry the cached
+  score is served immediately and ONE background refresh is started.
+- Concurrent misses for the same customer share a single in-flight request.
+Errors are never cached; every waiter of a failed fetch sees the exception.
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class BureauScoreCache:
+    def __init__(self, fetch: Callable[[str], Awaitable], ttl_seconds: float = 300,
+                 max_entries: int = 10000, stale_seconds: float = 0):
+        self.fetch = fetch
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.stale_seconds = stale_seconds
+
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # customer_id -> (value, fetched_at)
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.metrics = {"hits": 0, "stale_hits": 0, "misses": 0, "coalesced": 0, "errors": 0, "evictions": 0}
+
+    async def get(self, customer_id: str):
+        entry = self._entries.get(customer_id)
+        if entry is not None:
+            value, fetched_at = entry
+            age = time.monotonic() - fetched_at
+            if age < self.ttl_seconds:
+                self.metrics["hits"] += 1
+                self._entries.move_to_end(customer_id)
+                return value
+            if age < self.ttl_seconds + self.stale_seconds:
+                self.metrics["stale_hits"] += 1
+                self._entries.move_to_end(customer_id)
+                self._start_fetch(customer_id)  # revalidate in the background
+                return value
+
+        if customer_id in self._inflight:
+            self.metrics["coalesced"] += 1
+        else:
+            self.metrics["misses"] += 1
+        # shield: a cancelled caller must not cancel the fetch other callers are waiting on
+        return await asyncio.shield(self._start_fetch(customer_id))
+
+    def _start_fetch(self, customer_id: str) -> asyncio.Task:
+        task = self._inflight.get(customer_id)
+        if task is None:
+            task = asyncio.create_task(self._fetch_and_store(customer_id))
+            self._inflight[customer_id] = task
+            task.add_done_callback(lambda t: self._on_fetch_done(customer_id, t))
+        return task
+
+    def _on_fetch_done(self, customer_id: str, task: asyncio.Task):
+        self._inflight.pop(customer_id, None)
+        # Background revalidations may have no waiter: consume the error so it is logged once
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Bureau fetch failed for {customer_id}: {task.exception()}")
+
+    async def _fetch_and_store(self, customer_id: str):
+        try:
+            value = await self.fetch(customer_id)
+        except Exception:
+            self.metrics["errors"] += 1
+            raise
+        self._entries[customer_id] = (value, time.monotonic())
+        self._entries.move_to_end(customer_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.metrics["evictions"] += 1
+        return value
+
+    def invalidate(self, customer_id: str = None):
+        if customer_id is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(customer_id, None)
+
+    def stats(self) -> dict:
+        served = self.metrics["hits"] + self.metrics["stale_hits"]
+        lookups = served + self.metrics["misses"] + self.metrics["coalesced"]
+        return {
+            **self.metrics,
+            "size": len(self._entries),
+            "inflight": len(self._inflight),
+            "hit_rate": round(served / lookups, 3) if lookups else 0.0
+        }
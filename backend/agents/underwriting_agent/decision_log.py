@@ -0,0 +1,162 @@
+"""
+Append-only structured log of underwriting decisions.
+
+One compact NDJSON record per decision, carrying the intermediate values that produced it
+(bureau score, band, spread, capped tenure, EMI, FOIR headroom, policy version).
+
+- Writes never block the request path: `record()` only appends to an in-memory buffer; a
+  background task flushes it in batches (every `flush_interval` seconds or `batch_size`
+  records) with the file I/O pushed to a worker thread.
+- The buffer is capped at `max_buffered` records. While writes keep failing, records beyond
+  the cap are dropped (newest first) and counted in `dropped` rather than exhausting memory.
+- Files are rolled per UTC day (decisions-YYYYMMDD.ndjson), so a time-range query only
+  opens the days it covers. Within a file, customer/loan filters are matched on the raw
+  line before any JSON parsing, which keeps scans over millions of records cheap.
+"""
+import asyncio
+import glob
+import json
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_PREFIX = "decisions-"
+SEGMENT_SUFFIX = ".ndjson"
+
+
+def _segment_day(ts: float) -> str:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).strftime("%Y%m%d")
+
+
+def _field_token(key: str, value: str) -> str:
+    """Exact serialised form of `"key":value` as written by record(), for raw-line matching."""
+    return f'"{key}":{json.dumps(value)}'
+
+
+class DecisionLog:
+    def __init__(self, directory: str, flush_interval: float = 1.0, batch_size: int = 500,
+                 max_buffered: int = 100_000):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_buffered = max_buffered
+
+        self._buffer: List[tuple] = []  # (segment_day, serialised line)
+        self._wake = None
+        self._flusher = None
+        self._write_lock = None
+        self.metrics = {"recorded": 0, "flushed": 0, "flushes": 0, "write_errors": 0, "dropped": 0}
+
+    # --- Lifecycle ---
+    async def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self._wake = asyncio.Event()
+        self._write_lock = asyncio.Lock()
+        self._flusher = asyncio.create_task(self._flush_loop())
+
+    async def close(self):
+        if self._flusher:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        await self.flush()
+
+    # --- Write path ---
+    def record(self, decision: dict):
+        """Buffers one decision. Never touches the disk on the caller's path."""
+        if len(self._buffer) >= self.max_buffered:
+            self._drop(1)
+            return
+        ts = decision.setdefault("ts", round(time.time(), 3))
+        line = json.dumps(decision, separators=(",", ":"), default=float) + "\n"
+        self._buffer.append((_segment_day(ts), line))
+        self.metrics["recorded"] += 1
+        if self._wake is not None and len(self._buffer) >= self.batch_size:
+            self._wake.set()
+
+    async def _flush_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Decision log flush failed: {e}")
+
+    async def flush(self):
+        if not self._buffer:
+            return
+        pending, self._buffer = self._buffer, []
+        async with self._write_lock or asyncio.Lock():
+            try:
+                await asyncio.to_thread(self._write, pending)
+            except Exception:
+                # Put the batch back in front so nothing is lost; retried on the next flush
+                self._buffer[:0] = pending
+                self.metrics["write_errors"] += 1
+                overflow = len(self._buffer) - self.max_buffered
+                if overflow > 0:
+                    del self._buffer[self.max_buffered:]
+                    self._drop(overflow)
+                raise
+        self.metrics["flushed"] += len(pending)
+        self.metrics["flushes"] += 1
+
+    def _drop(self, count: int):
+        if not self.metrics["dropped"]:
+            logger.error(f"Decision log buffer full ({self.max_buffered} records); dropping decisions until writes recover")
+        self.metrics["dropped"] += count
+
+    def _write(self, pending: List[tuple]):
+        os.makedirs(self.directory, exist_ok=True)
+        by_day = {}
+        for day, line in pending:
+            by_day.setdefault(day, []).append(line)
+        for day, lines in by_day.items():
+            path = os.path.join(self.directory, f"{SEGMENT_PREFIX}{day}{SEGMENT_SUFFIX}")
+            with open(path, "a", encoding="utf-8") as f:
+                f.write("".join(lines))
+
+    # --- Read path ---
+    def _segments(self, since: Optional[float], until: Optional[float]) -> List[str]:
+        first = _segment_day(since) if since is not None else None
+        last = _segment_day(until) if until is not None else None
+        paths = []
+        for path in sorted(glob.glob(os.path.join(self.directory, f"{SEGMENT_PREFIX}*{SEGMENT_SUFFIX}"))):
+            day = os.path.basename(path)[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]
+            if (first is None or day >= first) and (last is None or day <= last):
+                paths.append(path)
+        return paths
+
+    def scan(self, customer_id: str = None, loan_id: str = None,
+             since: float = None, until: float = None, limit: int = None) -> Iterator[str]:
+        """Yields matching raw NDJSON lines (oldest first). Call `flush()` first to include buffered records."""
+        tokens = [_field_token(k, v) for k, v in (("customer_id", customer_id), ("loan_id", loan_id)) if v is not None]
+        check_time = since is not None or until is not None
+        emitted = 0
+        for path in self._segments(since, until):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if tokens and not all(t in line for t in tokens):
+                        continue
+                    if check_time:
+                        ts = json.loads(line)["ts"]
+                        if (since is not None and ts < since) or (until is not None and ts > until):
+                            continue
+                    yield line
+                    emitted += 1
+                    if limit is not None and emitted >= limit:
+                        return
+
+    def stats(self) -> dict:
+        return {**self.metrics, "buffered": len(self._buffer), "segments": len(self._segments(None, None))}
@@ -1,11 +1,23 @@
 import uvicorn
+import asyncio
 import httpx
+import json
 import logging
 import math
 import os
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+import uuid
+import numpy as np
+from datetime import datetime
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field, confloat, conint
 from contextlib import asynccontextmanager
+from typing import List, Literal, Optional
+from bureau_cache import BureauScoreCache
+from batch_engine import evaluate_batch, counter_offer_grid, DECISION_REASONS, APPROVED
+from risk_policy import PolicyStore, CompiledPolicy, PolicyError, DEFAULT_POLICY_PATH
+from amortisation import stream_schedules, schedule_summary
+from decision_log import DecisionLog
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -13,50 +25,78 @@ logger = logging.getLogger(__name__)
 
 # --- Configuration ---
 CREDIT_BUREAU_URL = "http://127.0.0.1:9002/credit_score"
+BUREAU_CACHE_TTL_SECONDS = float(os.getenv("BUREAU_CACHE_TTL_SECONDS", "300"))
+BUREAU_CACHE_MAX_ENTRIES = int(os.getenv("BUREAU_CACHE_MAX_ENTRIES", "10000"))
+BUREAU_CACHE_STALE_SECONDS = float(os.getenv("BUREAU_CACHE_STALE_SECONDS", "0"))  # 0 = no stale-while-revalidate
+
+DECISION_LOG_DIR = os.getenv("DECISION_LOG_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "decision_log"))
+DECISION_LOG_FLUSH_SECONDS = float(os.getenv("DECISION_LOG_FLUSH_SECONDS", "1"))
+DECISION_LOG_BATCH_SIZE = int(os.getenv("DECISION_LOG_BATCH_SIZE", "500"))
+DECISION_LOG_MAX_BUFFERED = int(os.getenv("DECISION_LOG_MAX_BUFFERED", "100000"))
+
+# --- Risk Policy (versioned JSON, hot-reloaded when the file changes) ---
+policy_store = PolicyStore(
+    os.getenv("RISK_POLICY_PATH", DEFAULT_POLICY_PATH),
+    check_interval=float(os.getenv("RISK_POLICY_CHECK_SECONDS", "5"))
+)
 
 # --- Models ---
 class UnderwriteRequest(BaseModel):
     customer_id: str
+    loan_id: Optional[str] = None  # generated when absent; echoed back and used as the audit key
     requested_loan_amount: int
     pre_approved_limit: int
     monthly_salary: int
     interest_rate: float
     loan_tenure_months: int
 
+class BatchUnderwriteRequest(BaseModel):
+    """Columnar batch: the i-th entry of every list belongs to the same application."""
+    customer_ids: List[str]
+    credit_scores: List[int]
+    requested_loan_amounts: List[float]
+    pre_approved_limits: List[float]
+    monthly_salaries: List[float]
+    interest_rates: List[float]
+    loan_tenure_months: List[int]
+
+class ScheduleRequest(BaseModel):
+    loan_id: str = "loan"
+    principal: float = Field(gt=0)
+    interest_rate: float = Field(ge=0)
+    tenure_months: int = Field(gt=0, le=600)
+    format: Literal["csv", "ndjson"] = "ndjson"
+
+class BatchScheduleRequest(BaseModel):
+    """Columnar: the i-th entry of every list belongs to the same loan."""
+    loan_ids: List[str]
+    principals: List[confloat(gt=0)]
+    interest_rates: List[confloat(ge=0)]
+    tenure_months: List[conint(gt=0, le=600)]   # same bounds as ScheduleRequest; caps the padded matrix width
+    format: Literal["csv", "ndjson"] = "csv"
+
+SCHEDULE_MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
 class CreditScoreResponse(BaseModel):
     cust_id: str
     score: int
 
 # --- RISK ENGINE LOGIC ---
-def calculate_risk_profile(credit_score: int, requested_rate: float, requested_tenure: int):
+def calculate_risk_profile(credit_score: int, requested_rate: float, requested_tenure: int,
+                           policy: CompiledPolicy = None):
     """
     Determines risk category and adjusts terms (Rate & Tenure) based on CIBIL score.
-    Simulates a sophisticated Rule Engine found in LOS platforms.
+    Bands come from the declarative risk policy (risk_policy.json); lookup is a binary search.
     """
-    # Defaults
-    risk_category = "Unknown"
-    spread = 0.0
-    max_tenure = 60 # Standard max is 5 years
-
-    if credit_score >= 800:
-        risk_category = "Excellent"
-        spread = -0.5  # Reward: 0.5% discount
-        max_tenure = 72 # Bonus: Allow 6 years
-    elif credit_score >= 750:
-        risk_category = "Low Risk"
-        spread = 0.0   # Standard rate
-        max_tenure = 60
-    elif credit_score >= 700:
-        risk_category = "Medium Risk"
-        spread = 1.5   # Penalty: +1.5% interest
-        max_tenure = 48 # Restriction: Max 4 years
-    elif credit_score >= 650:
-        risk_category = "High Risk"
-        spread = 3.5   # Heavy Penalty: +3.5% interest
-        max_tenure = 24 # Strict Restriction: Max 2 years
-    else:
+    policy = policy or policy_store.get()
+    band = policy.band_index(credit_score)
+    if band < 0:
         return None # Score too low, automatic rejection
 
+    risk_category = str(policy.categories[band])
+    spread = float(policy.spreads[band])
+    max_tenure = int(policy.max_tenures[band])
+
     # Calculate final terms
     final_rate = round(requested_rate + spread, 2)
     final_tenure = min(requested_tenure, max_tenure)
@@ -65,7 +105,8 @@ def calculate_risk_profile(credit_score: int, requested_rate: float, requested_t
         "risk_category": risk_category,
         "final_rate": final_rate,
         "final_tenure": final_tenure,
-        "message": f"Rated {risk_category}. Spread: {spread:+.1f}%"
+        "message": f"Rated {risk_category}. Spread: {spread:+.1f}%",
+        "policy_version": policy.version
     }
 
 def calculate_emi(p: int, r_annual: float, n_months: int) -> float:
@@ -83,32 +124,115 @@ def calculate_emi(p: int, r_annual: float, n_months: int) -> float:
 # --- HTTP Client ---
 app_http_client = None
 
+# --- Decision Audit Log ---
+decision_log = DecisionLog(
+    DECISION_LOG_DIR,
+    flush_interval=DECISION_LOG_FLUSH_SECONDS,
+    batch_size=DECISION_LOG_BATCH_SIZE,
+    max_buffered=DECISION_LOG_MAX_BUFFERED
+)
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     global app_http_client
     app_http_client = httpx.AsyncClient()
+    await decision_log.start()
     yield
-    await app_http_client.close()
+    await decision_log.close()
+    await app_http_client.aclose()
 
 app = FastAPI(title="Underwriting Agent (Risk Engine)", lifespan=lifespan)
 
 # --- Helper ---
-async def call_credit_bureau(customer_id: str) -> CreditScoreResponse:
+async def fetch_credit_score(customer_id: str) -> CreditScoreResponse:
     try:
-        response = await app_http_client.get(f"{CREDIT_BUREAU_URL}?cust_id={customer_id}")
+        response = await app_http_client.get(CREDIT_BUREAU_URL, params={"cust_id": customer_id})
         response.raise_for_status()
         return CreditScoreResponse(**response.json())
     except Exception as e:
         logger.error(f"Credit Bureau Error: {e}")
         raise
 
+bureau_cache = BureauScoreCache(
+    fetch_credit_score,
+    ttl_seconds=BUREAU_CACHE_TTL_SECONDS,
+    max_entries=BUREAU_CACHE_MAX_ENTRIES,
+    stale_seconds=BUREAU_CACHE_STALE_SECONDS
+)
+
+async def call_credit_bureau(customer_id: str) -> CreditScoreResponse:
+    """Cached + single-flight: repeat/concurrent lookups for a customer share one bureau call."""
+    return await bureau_cache.get(customer_id)
+
 # --- API Endpoints ---
 @app.get("/")
 def root(): return {"message": "Underwriting Risk Engine is live!"}
 
+@app.get("/metrics/bureau-cache")
+def bureau_cache_metrics(): return bureau_cache.stats()
+
+@app.get("/policy")
+def get_policy(): return policy_store.get().describe()
+
+@app.post("/policy/reload")
+def reload_policy():
+    """Forces a re-read of the policy file (normally picked up automatically within seconds)."""
+    try:
+        return policy_store.reload(strict=True).describe()
+    except (json.JSONDecodeError, PolicyError) as e:
+        # Invalid file: the previous policy stays active
+        raise HTTPException(status_code=422, detail=f"Policy file invalid, v{policy_store.get().version} still active: {e}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Policy reload failed: {e}")
+
+@app.get("/decisions")
+async def query_decisions(
+    customer_id: Optional[str] = None,
+    loan_id: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: int = Query(1000, ge=1, le=100000),
+    format: Literal["json", "ndjson"] = "json"
+):
+    """Audit query over the decision log. `format=ndjson` streams raw records for bulk jobs."""
+    await decision_log.flush()  # include decisions still sitting in the write buffer
+    lines = decision_log.scan(
+        customer_id=customer_id,
+        loan_id=loan_id,
+        since=since.timestamp() if since else None,
+        until=until.timestamp() if until else None,
+        limit=limit
+    )
+    if format == "ndjson":
+        return StreamingResponse(lines, media_type=SCHEDULE_MEDIA_TYPES["ndjson"])
+    # Large scans read disk; keep them off the event loop
+    decisions = await asyncio.to_thread(lambda: [json.loads(line) for line in lines])
+    return {"count": len(decisions), "decisions": decisions}
+
+@app.get("/metrics/decision-log")
+def decision_log_metrics(): return decision_log.stats()
+
 @app.post("/underwrite")
 async def underwrite(request: UnderwriteRequest):
     logger.info(f"Underwriting for {request.customer_id}: Amount {request.requested_loan_amount}")
+    # Snapshot the policy once so every rule in this decision uses the same version
+    policy = policy_store.get()
+    loan_id = request.loan_id or uuid.uuid4().hex[:16]
+    audit = {
+        "loan_id": loan_id,
+        "customer_id": request.customer_id,
+        "policy_version": policy.version,
+        "requested_amount": request.requested_loan_amount,
+        "pre_approved_limit": request.pre_approved_limit,
+        "monthly_salary": request.monthly_salary,
+        "requested_rate": request.interest_rate,
+        "requested_tenure": request.loan_tenure_months,
+    }
+
+    def decide(response: dict, reason_code: str, **intermediate) -> dict:
+        # One structured record per decision; buffered, so this never waits on disk
+        decision_log.record({**audit, **intermediate, "status": response["status"], "reason_code": reason_code})
+        return {**response, "loan_id": loan_id}
 
     # 1. Fetch CIBIL Score
     try:
@@ -119,33 +243,37 @@ async def underwrite(request: UnderwriteRequest):
         raise HTTPException(status_code=503, detail="Credit Bureau unavailable")
 
     # 2. Hard Stop: Minimum Score
-    if credit_score < 650:
-        return {
+    if credit_score < policy.min_credit_score:
+        return decide({
             "status": "rejected",
-            "reason": f"Credit score {credit_score} is below the policy minimum of 650.",
-            "approved_amount": 0
-        }
+            "reason": f"Credit score {credit_score} is below the policy minimum of {policy.min_credit_score}.",
+            "approved_amount": 0,
+            "policy_version": policy.version
+        }, "score_below_minimum", credit_score=credit_score)
 
     # 3. Policy Limit Check
-    # Rule: Absolute hard limit is 2x pre-approved offer.
-    # Note: 'risk_customers' asking for >2x limit are rejected here.
-    if request.requested_loan_amount > (2 * request.pre_approved_limit):
-         return {
+    # Rule: Absolute hard limit is a multiple (policy: 2x) of the pre-approved offer.
+    # Note: 'risk_customers' asking for more than that are rejected here.
+    if request.requested_loan_amount > (policy.max_limit_multiplier * request.pre_approved_limit):
+         return decide({
             "status": "rejected",
-            "reason": f"Requested amount exceeds maximum eligibility limit (2x Pre-approved).",
-            "approved_amount": 0
-        }
+            "reason": f"Requested amount exceeds maximum eligibility limit ({policy.max_limit_multiplier:g}x Pre-approved).",
+            "approved_amount": 0,
+            "policy_version": policy.version
+        }, "exceeds_eligibility_limit", credit_score=credit_score)
 
     # 4. Risk Engine: Calculate Adjusted Terms
     # This is where the 'Flexible Rate' magic happens
     risk_profile = calculate_risk_profile(
         credit_score, 
         request.interest_rate, 
-        request.loan_tenure_months
+        request.loan_tenure_months,
+        policy
     )
     
-    if not risk_profile: # Should be covered by <650 check, but safe fallback
-        return {"status": "rejected", "reason": "Risk profile ineligible."}
+    if not risk_profile: # Should be covered by the minimum score check, but safe fallback
+        return decide({"status": "rejected", "reason": "Risk profile ineligible.", "policy_version": policy.version},
+                      "risk_profile_ineligible", credit_score=credit_score)
 
     final_rate = risk_profile["final_rate"]
     final_tenure = risk_profile["final_tenure"]
@@ -155,24 +283,48 @@ async def underwrite(request: UnderwriteRequest):
     # 5. Affordability Check (EMI vs Salary)
     # We must use the NEW rate and NEW tenure for this calculation
     final_emi = calculate_emi(request.requested_loan_amount, final_rate, final_tenure)
-    max_allowed_emi = request.monthly_salary * 0.50
+    max_allowed_emi = request.monthly_salary * policy.max_foir
 
     logger.info(f"New EMI: {final_emi:.2f} | Max Allowed: {max_allowed_emi}")
 
+    terms = {
+        "credit_score": credit_score,
+        "band": policy.band_index(credit_score),
+        "risk_category": risk_profile["risk_category"],
+        "spread": round(final_rate - request.interest_rate, 2),
+        "final_rate": final_rate,
+        "final_tenure": final_tenure,
+        "emi": round(final_emi, 2),
+        "max_emi": round(max_allowed_emi, 2),
+        "foir": round(final_emi / request.monthly_salary, 4) if request.monthly_salary else None,
+    }
+
     if final_emi > max_allowed_emi:
-        # User cannot afford this loan at the RISK-ADJUSTED rate
-        return {
+        # User cannot afford this loan at the RISK-ADJUSTED rate.
+        # Solve for what they CAN afford so the caller doesn't have to trial-and-error amounts.
+        counter_offer = counter_offer_grid(
+            policy,
+            credit_score,
+            request.requested_loan_amount,
+            request.pre_approved_limit,
+            request.monthly_salary,
+            request.interest_rate
+        )
+        best_offer = counter_offer["best_offer"] if counter_offer else None
+        return decide({
             "status": "rejected",
             "reason": (
                 f"Based on your credit profile ({risk_profile['risk_category']}), "
                 f"the adjusted interest rate is {final_rate}% for {final_tenure} months. "
-                f"The resulting EMI ({int(final_emi)}) exceeds 50% of your salary."
+                f"The resulting EMI ({int(final_emi)}) exceeds {policy.max_foir:.0%} of your salary."
             ),
-            "approved_amount": 0
-        }
+            "approved_amount": 0,
+            "counter_offer": counter_offer,
+            "policy_version": policy.version
+        }, "emi_exceeds_foir", **terms, counter_offer_amount=best_offer["amount"] if best_offer else None)
 
     # 6. Approval
-    return {
+    return decide({
         "status": "approved",
         "reason": f"Approved. {risk_profile['message']}",
         "approved_amount": request.requested_loan_amount,
@@ -180,8 +332,71 @@ async def underwrite(request: UnderwriteRequest):
         "final_interest_rate": final_rate,
         "final_tenure": final_tenure,
         "final_emi": int(final_emi),
-        "risk_category": risk_profile['risk_category']
-    }
+        "risk_category": risk_profile['risk_category'],
+        "policy_version": policy.version
+    }, "approved", **terms)
+
+@app.post("/underwrite/batch")
+def underwrite_batch(request: BatchUnderwriteRequest):
+    """
+    Portfolio re-scoring: evaluates thousands of applications in one vectorised pass.
+    Credit scores are supplied by the caller (no bureau call per row).
+    Returns columnar results aligned with customer_ids.
+    """
+    columns = [
+        request.credit_scores, request.requested_loan_amounts, request.pre_approved_limits,
+        request.monthly_salaries, request.interest_rates, request.loan_tenure_months
+    ]
+    count = len(request.customer_ids)
+    if any(len(col) != count for col in columns):
+        raise HTTPException(status_code=400, detail="All columns must have the same length as customer_ids.")
+
+    policy = policy_store.get()
+    result = evaluate_batch(policy, *columns)
+    decision = result["decision"]
+    band = result["band"]
+    approved = decision == APPROVED
+    logger.info(f"Batch underwriting: {count} applications, {int(approved.sum())} approved.")
+
+    # JSONResponse directly: skips jsonable_encoder, which is the slow part for big batches
+    return JSONResponse({
+        "count": count,
+        "policy_version": policy.version,
+        "approved_count": int(approved.sum()),
+        "customer_ids": request.customer_ids,
+        "status": np.where(approved, "approved", "rejected").tolist(),
+        "reason": DECISION_REASONS[decision].tolist(),
+        "risk_category": np.where(band >= 0, policy.categories[np.maximum(band, 0)], "Ineligible").tolist(),
+        "final_interest_rate": result["final_rate"].tolist(),
+        "final_tenure": result["final_tenure"].tolist(),
+        "final_emi": result["final_emi"].astype(np.int64).tolist(),
+        "approved_amount": result["approved_amount"].astype(np.int64).tolist()
+    })
+
+# --- Amortisation Schedules (streamed) ---
+@app.post("/schedule")
+def repayment_schedule(request: ScheduleRequest):
+    """Full month-by-month repayment schedule for one loan, streamed as CSV or NDJSON."""
+    summary = schedule_summary(request.principal, request.interest_rate, request.tenure_months)
+    return StreamingResponse(
+        stream_schedules([request.loan_id], [request.principal], [request.interest_rate],
+                         [request.tenure_months], request.format),
+        media_type=SCHEDULE_MEDIA_TYPES[request.format],
+        headers={"X-EMI": str(summary["emi"]), "X-Total-Interest": str(summary["total_interest"])}
+    )
+
+@app.post("/schedule/batch")
+def repayment_schedule_batch(request: BatchScheduleRequest):
+    """Schedules for many loans (e.g. reconciliation), computed and streamed a chunk of loans at a time."""
+    count = len(request.loan_ids)
+    columns = [request.principals, request.interest_rates, request.tenure_months]
+    if any(len(col) != count for col in columns):
+        raise HTTPException(status_code=400, detail="All columns must have the same length as loan_ids.")
+
+    return StreamingResponse(
+        stream_schedules(request.loan_ids, *columns, fmt=request.format),
+        media_type=SCHEDULE_MEDIA_TYPES[request.format]
+    )
 
 if __name__ == "__main__":
     uvicorn.run(app, host="127.0.0.1", port=8003)
\ No newline at end of file
@@ -0,0 +1,126 @@
+"""
+Declarative risk policy: versioned JSON on disk, compiled into sorted arrays at load time.
+
+Band lookup is a binary search over the ascending min-score array (bisect for single
+decisions, np.searchsorted for batches). PolicyStore hot-reloads the file when it
+changes on disk; an invalid file is rejected and the previous policy stays active.
+"""
+import bisect
+import json
+import logging
+import math
+import os
+import threading
+import time
+from typing import Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POLICY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "risk_policy.json")
+
+
+class PolicyError(ValueError):
+    pass
+
+
+class CompiledPolicy:
+    """Immutable, pre-sorted view of one policy version."""
+
+    def __init__(self, raw: dict):
+        if not isinstance(raw, dict):
+            raise PolicyError(f"Policy must be a JSON object, not {type(raw).__name__}.")
+        bands = raw.get("bands") or []
+        if not bands:
+            raise PolicyError("Policy must define at least one band.")
+        try:
+            for band in bands:
+                spread = band["spread"]
+                if isinstance(spread, bool) or not isinstance(spread, (int, float)) or not math.isfinite(spread):
+                    raise PolicyError(f"Band spread must be a number, got {spread!r}.")
+            bands = sorted(bands, key=lambda b: int(b["min_score"]))
+            self.min_scores = np.array([int(b["min_score"]) for b in bands], dtype=np.int64)
+            self.categories = np.array([str(b["category"]) for b in bands])
+            self.spreads = np.array([float(b["spread"]) for b in bands], dtype=np.float64)
+            self.max_tenures = np.array([int(b["max_tenure"]) for b in bands], dtype=np.int64)
+            self.max_limit_multiplier = float(raw.get("max_limit_multiplier", 2.0))
+            self.max_foir = float(raw.get("max_foir", 0.5))
+        except (KeyError, TypeError, ValueError) as e:
+            raise PolicyError(f"Malformed policy band: {e}") from e
+        if len(set(self.min_scores.tolist())) != len(self.min_scores):
+            raise PolicyError("Band min_score values must be unique.")
+        if (self.max_tenures <= 0).any():
+            raise PolicyError("Band max_tenure must be a positive number of months.")
+        if not 0 < self.max_foir <= 1:
+            raise PolicyError("max_foir must be in (0, 1].")
+
+        self.version = str(raw.get("version", "unversioned"))
+        self.min_credit_score = int(self.min_scores[0])
+        # Plain-list copy for bisect on the scalar path (avoids numpy scalar overhead)
+        self._min_scores_list = self.min_scores.tolist()
+
+    def band_index(self, credit_score: int) -> int:
+        """Index of the band for a score, -1 if below the policy minimum."""
+        return bisect.bisect_right(self._min_scores_list, credit_score) - 1
+
+    def band_indices(self, credit_scores) -> np.ndarray:
+        return np.searchsorted(self.min_scores, np.asarray(credit_scores), side="right") - 1
+
+    def describe(self) -> dict:
+        return {
+            "version": self.version,
+            "min_credit_score": self.min_credit_score,
+            "max_limit_multiplier": self.max_limit_multiplier,
+            "max_foir": self.max_foir,
+            "bands": [
+                {"min_score": int(s), "category": str(c), "spread": float(sp), "max_tenure": int(t)}
+                for s, c, sp, t in zip(self.min_scores, self.categories, self.spreads, self.max_tenures)
+            ][::-1]
+        }
+
+
+class PolicyStore:
+    """Holds the active policy; re-checks the file's mtime at most every `check_interval` seconds."""
+
+    def __init__(self, path: str = DEFAULT_POLICY_PATH, check_interval: float = 5.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._policy: Optional[CompiledPolicy] = None
+        self._mtime = None
+        self._last_check = 0.0
+        self.reload()
+
+    def reload(self, strict: bool = False) -> CompiledPolicy:
+        """
+        Loads and compiles the file. An invalid file keeps the current policy (hot reload);
+        with strict=True the error is raised instead, so an explicit reload can't report success.
+        """
+        with self._lock:
+            mtime = os.path.getmtime(self.path)
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    policy = CompiledPolicy(json.load(f))
+            except (OSError, json.JSONDecodeError, PolicyError) as e:
+                if self._policy is None or strict:
+                    raise
+                logger.error(f"Risk policy reload failed, keeping v{self._policy.version}: {e}")
+                self._mtime = mtime  # don't retry the same broken file on every request
+                return self._policy
+            if self._policy is None or policy.version != self._policy.version:
+                logger.info(f"Risk policy v{policy.version} active ({len(policy.min_scores)} bands).")
+            self._policy, self._mtime = policy, mtime
+            self._last_check = time.monotonic()
+            return policy
+
+    def get(self) -> CompiledPolicy:
+        now = time.monotonic()
+        if now - self._last_check >= self.check_interval:
+            self._last_check = now
+            try:
+                if os.path.getmtime(self.path) != self._mtime:
+                    return self.reload()
+            except OSError as e:
+                logger.error(f"Risk policy file check failed: {e}")
+        return self._policy
@@ -0,0 +1,155 @@
+"""
+Monte Carlo portfolio stress testing on top of the vectorised risk engine.
+
+Each scenario draws systemic shocks (base-rate move, bureau-score drift, salary change)
+plus per-loan score noise, re-runs the full underwriting policy over the portfolio with
+evaluate_batch, and records portfolio metrics. Scenarios are split across a process
+pool; every worker receives the portfolio and policy once via its initializer.
+
+Usage:
+  python stress_test.py portfolio.csv --scenarios 5000 --rate-shock-bps 150 --score-shock -30
+Portfolio CSV/JSON columns: customer_id, credit_score, requested_loan_amount,
+pre_approved_limit, monthly_salary, interest_rate, loan_tenure_months
+"""
+import argparse
+import csv
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from batch_engine import evaluate_batch, APPROVED, DECISION_REASONS
+from risk_policy import CompiledPolicy, DEFAULT_POLICY_PATH
+
+PORTFOLIO_COLUMNS = {
+    "credit_score": np.int64,
+    "requested_loan_amount": np.float64,
+    "pre_approved_limit": np.float64,
+    "monthly_salary": np.float64,
+    "interest_rate": np.float64,
+    "loan_tenure_months": np.int64,
+}
+SCORE_FLOOR, SCORE_CEILING = 300, 900
+METRICS = ["approval_rate", "avg_emi_to_income", "avg_final_rate", "approved_volume"]
+
+
+# --- Portfolio loading ---
+def load_portfolio(path: str) -> dict:
+    """Reads a CSV or JSON (list of records) portfolio into typed column arrays."""
+    with open(path, "r", encoding="utf-8") as f:
+        records = json.load(f) if path.endswith(".json") else list(csv.DictReader(f))
+    if not records:
+        raise ValueError(f"Portfolio {path} is empty.")
+    return {col: np.array([r[col] for r in records], dtype=float).astype(dtype)
+            for col, dtype in PORTFOLIO_COLUMNS.items()}
+
+
+# --- Worker side ---
+_worker_portfolio = None
+_worker_policy = None
+
+
+def _init_worker(portfolio: dict, raw_policy: dict):
+    global _worker_portfolio, _worker_policy
+    _worker_portfolio = portfolio
+    _worker_policy = CompiledPolicy(raw_policy)
+
+
+def _run_scenarios(args) -> np.ndarray:
+    """Runs `count` scenarios; returns a (count x (len(METRICS) + reason codes)) array."""
+    count, seed, shocks = args
+    rng = np.random.default_rng(seed)
+    p = _worker_portfolio
+    n_loans = len(p["credit_score"])
+    out = np.zeros((count, len(METRICS) + len(DECISION_REASONS)))
+
+    for s in range(count):
+        rate_shock = rng.normal(shocks["rate_shock_bps"], shocks["rate_shock_std_bps"]) / 100.0
+        score_shock = rng.normal(shocks["score_shock"], shocks["score_shock_std"])
+        salary_shock = rng.normal(shocks["salary_shock_pct"], shocks["salary_shock_std_pct"]) / 100.0
+        noise = rng.normal(0.0, shocks["idiosyncratic_score_std"], n_loans)
+
+        scores = np.clip(np.rint(p["credit_score"] + score_shock + noise), SCORE_FLOOR, SCORE_CEILING)
+        salaries = np.maximum(p["monthly_salary"] * (1.0 + salary_shock), 0.0)
+        result = evaluate_batch(
+            _worker_policy, scores, p["requested_loan_amount"], p["pre_approved_limit"],
+            salaries, p["interest_rate"] + rate_shock, p["loan_tenure_months"]
+        )
+
+        approved = result["decision"] == APPROVED
+        eligible = result["band"] >= 0
+        out[s, 0] = approved.mean()
+        out[s, 1] = (result["final_emi"][approved] / salaries[approved]).mean() if approved.any() else 0.0
+        out[s, 2] = result["final_rate"][eligible].mean() if eligible.any() else 0.0
+        out[s, 3] = result["approved_amount"].sum()
+        out[s, len(METRICS):] = np.bincount(result["decision"], minlength=len(DECISION_REASONS)) / n_loans
+    return out
+
+
+# --- Driver ---
+def _distribution(values: np.ndarray) -> dict:
+    p5, p50, p95 = np.percentile(values, [5, 50, 95])
+    return {
+        "mean": float(values.mean()), "std": float(values.std()),
+        "p5": float(p5), "p50": float(p50), "p95": float(p95),
+        "min": float(values.min()), "max": float(values.max()),
+    }
+
+
+def run_stress_test(portfolio: dict, raw_policy: dict, scenarios: int = 1000, shocks: dict = None,
+                    workers: int = None, seed: int = 42, chunk_size: int = 100) -> dict:
+    shocks = {
+        "rate_shock_bps": 0.0, "rate_shock_std_bps": 25.0,
+        "score_shock": 0.0, "score_shock_std": 10.0,
+        "salary_shock_pct": 0.0, "salary_shock_std_pct": 2.0,
+        "idiosyncratic_score_std": 15.0,
+        **(shocks or {}),
+    }
+    counts = [min(chunk_size, scenarios - start) for start in range(0, scenarios, chunk_size)]
+    # Independent, reproducible streams per chunk regardless of worker count
+    seeds = np.random.SeedSequence(seed).spawn(len(counts))
+    jobs = [(count, child, shocks) for count, child in zip(counts, seeds)]
+
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=_init_worker,
+                             initargs=(portfolio, raw_policy)) as pool:
+        results = np.vstack(list(pool.map(_run_scenarios, jobs)))
+
+    summary = {metric: _distribution(results[:, i]) for i, metric in enumerate(METRICS)}
+    summary["decision_mix"] = {
+        str(reason): float(results[:, len(METRICS) + i].mean()) for i, reason in enumerate(DECISION_REASONS)
+    }
+    return {
+        "policy_version": str(raw_policy.get("version", "unversioned")),
+        "scenarios": scenarios,
+        "loans": int(len(portfolio["credit_score"])),
+        "shocks": shocks,
+        "summary": summary,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte Carlo portfolio stress test")
+    parser.add_argument("portfolio", help="CSV or JSON portfolio file")
+    parser.add_argument("--policy", default=DEFAULT_POLICY_PATH)
+    parser.add_argument("--scenarios", type=int, default=1000)
+    parser.add_argument("--rate-shock-bps", type=float, default=0.0, help="Mean base-rate move")
+    parser.add_argument("--score-shock", type=float, default=0.0, help="Mean bureau score drift (points)")
+    parser.add_argument("--salary-shock-pct", type=float, default=0.0, help="Mean salary change (%%)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    with open(args.policy, "r", encoding="utf-8") as f:
+        raw_policy = json.load(f)
+    report = run_stress_test(
+        load_portfolio(args.portfolio), raw_policy, args.scenarios,
+        shocks={"rate_shock_bps": args.rate_shock_bps, "score_shock": args.score_shock,
+                "salary_shock_pct": args.salary_shock_pct},
+        workers=args.workers, seed=args.seed
+    )
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batch_engine import calculate_emi_vec, counter_offer_grid  # noqa: E402
+from risk_policy import CompiledPolicy  # noqa: E402
+
+
+def policy_with_cap(max_tenure):
+    return CompiledPolicy({
+        "version": "test",
+        "bands": [{"min_score": 650, "category": "Test", "spread": 1.0, "max_tenure": max_tenure}],
+        "max_limit_multiplier": 2.0,
+        "max_foir": 0.5,
+    })
+
+
+def grid(max_tenure, salary=40_000):
+    return counter_offer_grid(policy_with_cap(max_tenure), 700, 900_000, 500_000, salary, 10.0)
+
+
+def test_cap_below_one_year_offers_the_cap():
+    result = grid(6)
+    assert result["grid"]["tenures"] == [6]
+    assert list(result["max_amount_by_tenure"]) == [6]
+    assert result["best_offer"]["tenure_months"] == 6
+
+
+def test_cap_between_years_is_offered():
+    result = grid(18)
+    assert result["grid"]["tenures"] == [12, 18]
+    # Longer tenure -> lower EMI -> larger affordable amount
+    assert result["best_offer"]["tenure_months"] == 18
+    assert result["max_amount_by_tenure"][18] > result["max_amount_by_tenure"][12]
+
+
+def test_best_offer_is_affordable():
+    result = grid(18)
+    best = result["best_offer"]
+    assert calculate_emi_vec(best["amount"], result["interest_rate"], best["tenure_months"]) <= result["max_emi"]
+
+
+def test_no_salary_headroom_gives_no_best_offer():
+    assert grid(18, salary=0)["best_offer"] is None
+
+
+def test_yearly_caps_unchanged():
+    assert grid(48)["grid"]["tenures"] == [12, 24, 36, 48]
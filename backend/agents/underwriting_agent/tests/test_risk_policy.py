@@ -0,0 +1,49 @@
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from risk_policy import CompiledPolicy, PolicyError, PolicyStore  # noqa: E402
+
+VALID = {
+    "version": "1",
+    "bands": [{"min_score": 650, "category": "High Risk", "spread": 3.5, "max_tenure": 24}],
+}
+
+
+def with_band(**changes):
+    return {**VALID, "bands": [{**VALID["bands"][0], **changes}]}
+
+
+@pytest.mark.parametrize("raw", [
+    [VALID],
+    "policy",
+    with_band(max_tenure=-5),
+    with_band(max_tenure=0),
+    with_band(spread="1.5"),
+    with_band(spread=None),
+    with_band(spread=True),
+    {"bands": [["650", "x"]]},
+])
+def test_invalid_policy_raises_policy_error(raw):
+    with pytest.raises(PolicyError):
+        CompiledPolicy(raw)
+
+
+def test_short_tenure_cap_is_valid():
+    assert CompiledPolicy(with_band(max_tenure=6)).max_tenures.tolist() == [6]
+
+
+def test_non_object_file_keeps_previous_policy(tmp_path):
+    path = tmp_path / "policy.json"
+    path.write_text(json.dumps(VALID))
+    store = PolicyStore(str(path), check_interval=0)
+
+    path.write_text(json.dumps([VALID]))
+    os.utime(path, (1, 1))
+    assert store.get().version == "1"
+    with pytest.raises(PolicyError):
+        store.reload(strict=True)
@@ -1,14 +1,56 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File
+from fastapi import FastAPI, HTTPException, UploadFile, File, Response
 import uvicorn
 import httpx
 from pydantic import BaseModel
+import asyncio
+import hashlib
 import logging
-import re
-import pdfplumber  # <--- Replaces pytesseract/pdf2image
-from io import BytesIO
+import os
+import sys
+from contextlib import asynccontextmanager
+from concurrent.futures.process import BrokenProcessPool
+# Shared agent helpers live one level up (backend/agents/http_cache.py)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from http_cache import CachingTransport
+from statement_analyzer import PARSER_VERSION, analyze_statement
+from statement_cache import StatementCache
+from statement_pool import StatementPool, PoolSaturated
+
+# --- HTTP Client (shared; ETag-revalidating cache for CRM reads) ---
+crm_cache_transport = CachingTransport()
+app_http_client = None
+
+# --- Statement parsing runs in worker processes, off the event loop ---
+STATEMENT_WORKERS = int(os.getenv("STATEMENT_WORKERS", str(os.cpu_count() or 2)))
+statement_pool = StatementPool(
+    workers=STATEMENT_WORKERS,
+    max_queue=int(os.getenv("STATEMENT_MAX_QUEUE", str(2 * STATEMENT_WORKERS))),
+    timeout_seconds=float(os.getenv("STATEMENT_TIMEOUT_SECONDS", "60")),
+    max_tasks_per_child=int(os.getenv("STATEMENT_MAX_TASKS_PER_CHILD", "50"))
+)
+STATEMENT_RETRY_AFTER_SECONDS = "5"
+
+# --- Repeat uploads of the same PDF are served from a content-addressed result cache ---
+statement_cache = StatementCache(
+    directory=os.getenv("STATEMENT_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "statement_cache")),
+    version=PARSER_VERSION,
+    memory_entries=int(os.getenv("STATEMENT_CACHE_MEMORY_ENTRIES", "256")),
+    disk_max_bytes=int(float(os.getenv("STATEMENT_CACHE_DISK_MB", "512")) * 1024 * 1024),
+    ttl_seconds=float(os.getenv("STATEMENT_CACHE_TTL_SECONDS", "86400"))
+)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global app_http_client
+    app_http_client = httpx.AsyncClient(transport=crm_cache_transport)
+    statement_pool.start()
+    await asyncio.to_thread(statement_cache.start)
+    yield
+    statement_pool.shutdown()
+    await app_http_client.aclose()
 
 # --- Configuration ---
-app = FastAPI(title="Verification Agent (Text-Based)")
+app = FastAPI(title="Verification Agent (Text-Based)", lifespan=lifespan)
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -16,104 +58,6 @@ logger = logging.getLogger(__name__)
 
 CRM_SERVICE_URL = "http://127.0.0.1:9001/crm"
 
-# --- Helper Class ---
-class BankStatementAnalyzer:
-    def __init__(self):
-        # Same regex patterns
-        self.amount_pattern = re.compile(r"[-+]?\d{1,3}(?:,\d{3})*\.\d{2}")
-        self.date_pattern = re.compile(r"\d{2}[/-]\d{2}[/-]\d{4}")
-        
-        self.income_keywords = ["salary", "credit", "transfer in", "dividend", "interest"]
-        self.expense_keywords = ["debit", "withdrawal", "rent", "shopping", "food", "emi", "utility", "atm"]
-
-    def extract_text_from_pdf(self, file_bytes):
-        """
-        Extracts text from a 'True' PDF using pdfplumber.
-        Much faster and doesn't require Tesseract/Poppler.
-        """
-        try:
-            full_text = ""
-            with pdfplumber.open(BytesIO(file_bytes)) as pdf:
-                for page in pdf.pages:
-                    # Extract text, maintaining layout as best as possible
-                    text = page.extract_text()
-                    if text:
-                        full_text += text + "\n"
-            return full_text
-        except Exception as e:
-            logger.error(f"PDF Parsing Failed: {e}")
-            return ""
-
-    def parse_transactions(self, text):
-        """Parses raw text into structured transaction data."""
-        lines = text.split('\n')
-        transactions = []
-        
-        for line in lines:
-            date_match = self.date_pattern.search(line)
-            amount_matches = self.amount_pattern.findall(line)
-            
-            if date_match and amount_matches:
-                # Basic parsing logic (same as before)
-                try:
-                    amount_str = amount_matches[-1].replace(',', '') # Take the last match often typically amount
-                    amount = float(amount_str)
-                    
-                    # Clean description
-                    description = line.replace(date_match.group(), "").replace(amount_matches[-1], "").strip()
-                    
-                    # Simple classification
-                    tx_type = "Expense"
-                    if amount < 0:
-                        tx_type = "Expense"
-                    elif any(word in description.lower() for word in self.income_keywords):
-                        tx_type = "Income"
-                    elif any(word in description.lower() for word in self.expense_keywords):
-                        tx_type = "Expense"
-                    else:
-                        tx_type = "Income" if amount > 0 else "Expense"
-
-                    transactions.append({
-                        "date": date_match.group(),
-                        "description": description,
-                        "amount": amount,
-                        "type": tx_type
-                    })
-                except ValueError:
-                    continue 
-
-        return transactions
-
-    def calculate_score(self, transactions):
-        """Calculates financial health score."""
-        if not transactions:
-            return 0, {}
-
-        total_income = sum(t['amount'] for t in transactions if t['type'] == 'Income')
-        total_expenses = sum(abs(t['amount']) for t in transactions if t['type'] == 'Expense')
-        
-        has_salary = any("salary" in t['description'].lower() for t in transactions)
-        income_stability_score = 20 if has_salary else 5
-
-        if total_income > 0:
-            expense_ratio = total_expenses / total_income
-        else:
-            expense_ratio = 1.0 
-            
-        volatility_penalty = min(expense_ratio * 20, 30)
-        raw_score = 50 + income_stability_score - volatility_penalty
-        final_score = max(0, min(100, int(raw_score)))
-
-        insights = {
-            "total_income": total_income,
-            "total_expenses": total_expenses,
-            "net_flow": total_income - total_expenses,
-            "salary_detected": has_salary
-        }
-        
-        return final_score, insights
-
-analyzer = BankStatementAnalyzer()
 
 # --- Models ---
 class VerificationRequest(BaseModel):
@@ -126,16 +70,19 @@ async def verify_kyc(request: VerificationRequest):
     """(Existing CRM Logic)"""
     customer_id = request.customer_id
     logger.info(f"Checking CRM for: {customer_id}")
-    async with httpx.AsyncClient() as client:
-        try:
-            resp = await client.get(f"{CRM_SERVICE_URL}/{customer_id}")
-            resp.raise_for_status()
-            return {"status": "verified", "kyc": resp.json()}
-        except Exception as e:
-            raise HTTPException(500, detail=str(e))
+    try:
+        # Repeat lookups revalidate with If-None-Match; an unchanged record costs a 304
+        resp = await app_http_client.get(f"{CRM_SERVICE_URL}/{customer_id}")
+        resp.raise_for_status()
+        return {"status": "verified", "kyc": resp.json()}
+    except Exception as e:
+        raise HTTPException(500, detail=str(e))
+
+@app.get("/metrics/crm-cache")
+def crm_cache_metrics(): return crm_cache_transport.stats()
 
 @app.post("/analyze-statement")
-async def analyze_bank_statement(file: UploadFile = File(...)):
+async def analyze_bank_statement(response: Response, file: UploadFile = File(...)):
     """
     Parses a digital PDF bank statement (no scans).
     """
@@ -143,26 +90,44 @@ async def analyze_bank_statement(file: UploadFile = File(...)):
         raise HTTPException(400, detail="File must be a PDF")
 
     file_bytes = await file.read()
-    
-    # 1. Extract Text (No OCR)
-    raw_text = analyzer.extract_text_from_pdf(file_bytes)
-    
-    if not raw_text.strip():
-        return {
-            "status": "failed",
-            "message": "Could not extract text. If this is a scanned image, OCR is required (not enabled)."
-        }
-
-    # 2. Parse & Score
-    transactions = analyzer.parse_transactions(raw_text)
-    score, insights = analyzer.calculate_score(transactions)
-    
-    return {
-        "filename": file.filename,
-        "score": score,
-        "insights": insights,
-        "transactions_preview": transactions[:5]
-    }
+    digest = await asyncio.to_thread(lambda: hashlib.sha256(file_bytes).hexdigest())
+
+    # Same bytes + same parser version -> cached result; otherwise extract, parse & score
+    # in a worker process so the event loop stays free for /verify
+    try:
+        result, cache_hit = await statement_cache.get_or_compute(
+            digest, lambda: statement_pool.run(analyze_statement, file_bytes)
+        )
+    except PoolSaturated as e:
+        logger.warning(f"Rejecting statement {file.filename}: {e}")
+        raise HTTPException(
+            503,
+            detail="Statement analysis is at capacity. Please retry shortly.",
+            headers={"Retry-After": STATEMENT_RETRY_AFTER_SECONDS}
+        )
+    except asyncio.TimeoutError:
+        raise HTTPException(504, detail=f"Statement analysis timed out after {statement_pool.timeout_seconds:g}s.")
+    except BrokenProcessPool:
+        # Worker died or its pool was recycled after another job hung; a retry gets a fresh pool
+        raise HTTPException(
+            503,
+            detail="Statement analysis was interrupted. Please retry shortly.",
+            headers={"Retry-After": STATEMENT_RETRY_AFTER_SECONDS}
+        )
+    except Exception as e:
+        logger.error(f"Statement analysis failed for {file.filename}: {e}")
+        raise HTTPException(500, detail="Statement analysis failed.")
+    response.headers["X-Statement-Cache"] = "hit" if cache_hit else "miss"
+
+    if result.get("status") == "failed":
+        return result
+    return {"filename": file.filename, **result}
+
+@app.get("/metrics/statement-pool")
+def statement_pool_metrics(): return statement_pool.stats()
+
+@app.get("/metrics/statement-cache")
+def statement_cache_metrics(): return statement_cache.stats()
 
 if __name__ == "__main__":
     uvicorn.run(app, host="127.0.0.1", port=8002)
\ No newline at end of file
@@ -0,0 +1,201 @@
+"""
+Content-addressed cache for statement analysis results.
+
+Re-uploads of the same PDF (client retries, the master agent calling the tool twice) are
+answered without re-parsing. The key is the SHA-256 of the uploaded bytes, so a filename
+change never matters and any byte change is a miss.
+
+- Memory tier: LRU of result dicts, bounded by entry count.
+- Disk tier: one JSON file per digest under <directory>/v<PARSER_VERSION>/, bounded by total
+  bytes and evicted least-recently-used. Survives restarts; writes are atomic (temp file + rename).
+- Versioning: results are only valid for the parser that produced them. Bump PARSER_VERSION
+  in statement_analyzer.py; directories from other versions are deleted at start-up.
+- Retention: entries older than ttl_seconds are misses and are removed, since a result
+  holds a preview of the customer's transactions.
+- Single flight: concurrent uploads of the same bytes wait for one analysis, which keeps
+  running (and is cached) even if the request that started it is cancelled.
+"""
+import asyncio
+import json
+import logging
+import os
+import shutil
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class StatementCache:
+    def __init__(self, directory: str, version: str, memory_entries: int = 256,
+                 disk_max_bytes: int = 512 * 1024 * 1024, ttl_seconds: float = 86400):
+        self.root = directory
+        self.version = version
+        self.directory = os.path.join(directory, f"v{version}") if directory else None
+        self.memory_entries = memory_entries
+        self.disk_max_bytes = disk_max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()   # digest -> (stored_at, result)
+        self._disk: "OrderedDict[str, int]" = OrderedDict()       # digest -> file size, LRU order
+        self._disk_bytes = 0
+        self._inflight = {}
+        self.metrics = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "coalesced": 0,
+                        "stored": 0, "expired": 0, "memory_evictions": 0, "disk_evictions": 0,
+                        "disk_errors": 0}
+
+    # --- Lifecycle ---
+    def start(self):
+        """Drops other parser versions and indexes what is already on disk (oldest first)."""
+        if not self.directory:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if name != f"v{self.version}" and name.startswith("v") and os.path.isdir(path):
+                logger.info(f"Removing statement cache for parser {name}")
+                shutil.rmtree(path, ignore_errors=True)
+
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                st = os.stat(os.path.join(self.directory, name))
+                entries.append((st.st_mtime, name[:-5], st.st_size))
+        for _, digest, size in sorted(entries):
+            self._disk[digest] = size
+            self._disk_bytes += size
+        self._evict_disk()
+
+    # --- Lookup ---
+    async def get_or_compute(self, digest: str, compute):
+        """Returns (result, hit). `compute` is an async callable run only on a miss."""
+        result = await self.get(digest)
+        if result is not None:
+            return result, True
+
+        task = self._inflight.get(digest)
+        if task is not None:
+            self.metrics["coalesced"] += 1
+            return await asyncio.shield(task), True
+
+        # The analysis runs as its own task: a cancelled caller (client disconnect) stops
+        # waiting, but the work and every coalesced waiter carry on.
+        task = asyncio.get_running_loop().create_task(self._compute_and_store(digest, compute))
+        self._inflight[digest] = task
+        task.add_done_callback(lambda t: self._finished(digest, t))
+        return await asyncio.shield(task), False
+
+    async def _compute_and_store(self, digest: str, compute):
+        result = await compute()
+        await self.put(digest, result)
+        return result
+
+    def _finished(self, digest: str, task):
+        if self._inflight.get(digest) is task:
+            del self._inflight[digest]
+        if not task.cancelled():
+            task.exception()   # mark retrieved when every caller has gone
+
+    async def get(self, digest: str):
+        entry = self._memory.get(digest)
+        if entry is not None:
+            if self._expired(entry[0]):
+                self._memory.pop(digest, None)
+                self.metrics["expired"] += 1
+            else:
+                self._memory.move_to_end(digest)
+                self.metrics["memory_hits"] += 1
+                return entry[1]
+
+        if self.directory and digest in self._disk:
+            entry, problem = await asyncio.to_thread(self._read, digest)
+            if entry is not None:
+                self._disk.move_to_end(digest)
+                self._remember(digest, entry["stored_at"], entry["result"])
+                self.metrics["disk_hits"] += 1
+                return entry["result"]
+            self._disk_bytes -= self._disk.pop(digest, 0)
+            self.metrics[problem] += 1
+
+        self.metrics["misses"] += 1
+        return None
+
+    async def put(self, digest: str, result: dict):
+        stored_at = time.time()
+        self._remember(digest, stored_at, result)
+        self.metrics["stored"] += 1
+        if self.directory:
+            size = await asyncio.to_thread(self._write, digest, {"stored_at": stored_at, "result": result})
+            if size:
+                self._disk_bytes += size - self._disk.pop(digest, 0)
+                self._disk[digest] = size
+                self._evict_disk()
+            else:
+                self.metrics["disk_errors"] += 1
+
+    # --- Internals ---
+    def _expired(self, stored_at: float) -> bool:
+        return time.time() - stored_at > self.ttl_seconds
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.directory, f"{digest}.json")
+
+    def _remember(self, digest: str, stored_at: float, result: dict):
+        self._memory[digest] = (stored_at, result)
+        self._memory.move_to_end(digest)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+            self.metrics["memory_evictions"] += 1
+
+    def _read(self, digest: str):
+        """Runs in a thread: (entry, None) on a hit, else (None, metric) with the file removed."""
+        path = self._path(digest)
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+            if not self._expired(entry["stored_at"]):
+                os.utime(path)   # keep disk LRU order across restarts
+                return entry, None
+            problem = "expired"
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Statement cache entry {digest[:12]} unreadable: {e}")
+            problem = "disk_errors"
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return None, problem
+
+    def _write(self, digest: str, entry: dict) -> int:
+        """Runs in a thread: bytes written, or 0 if the write failed."""
+        tmp_path = f"{self._path(digest)}.{os.getpid()}.tmp"
+        try:
+            data = json.dumps(entry, separators=(",", ":")).encode("utf-8")
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, self._path(digest))
+            return len(data)
+        except OSError as e:
+            logger.warning(f"Statement cache write failed: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return 0
+
+    def _drop(self, digest: str):
+        self._disk_bytes -= self._disk.pop(digest, 0)
+        try:
+            os.remove(self._path(digest))
+        except OSError:
+            pass
+
+    def _evict_disk(self):
+        while self._disk_bytes > self.disk_max_bytes and self._disk:
+            digest = next(iter(self._disk))
+            self._drop(digest)
+            self.metrics["disk_evictions"] += 1
+
+    def stats(self) -> dict:
+        return {**self.metrics, "parser_version": self.version, "memory_size": len(self._memory),
+                "disk_entries": len(self._disk), "disk_bytes": self._disk_bytes,
+                "disk_enabled": bool(self.directory)}
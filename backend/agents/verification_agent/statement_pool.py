@@ -0,0 +1,141 @@
+"""
+Bounded process pool for CPU-heavy statement parsing.
+
+pdfplumber extraction of a long statement can take seconds of pure CPU. Run on the event
+loop, that would freeze every other request, /verify included. Jobs go to worker processes
+instead, under three limits:
+
+- Admission: at most `workers + max_queue` jobs in flight. Beyond that, `run()` raises
+  PoolSaturated at once (the endpoint answers 503 + Retry-After), so callers never queue
+  without bound.
+- Timeout: the caller gets asyncio.TimeoutError after `timeout_seconds`. A process job
+  cannot be interrupted, so the pool is recycled: its workers are terminated, a fresh pool
+  replaces it and the slot is freed. Otherwise a few pathological PDFs would hold every
+  worker forever. Other jobs running on the recycled pool fail with BrokenProcessPool.
+- Crash recovery: if a worker dies (e.g. OOM on a huge PDF), the broken pool is replaced.
+
+Workers use the "spawn" start method (no forking of the threaded event-loop process) and,
+on Python 3.11+, are recycled every `max_tasks_per_child` jobs to cap pdfplumber's memory growth.
+"""
+import asyncio
+import logging
+import multiprocessing
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+logger = logging.getLogger(__name__)
+
+
+class PoolSaturated(Exception):
+    """Raised when the pool is already holding its maximum number of jobs."""
+
+
+class StatementPool:
+    def __init__(self, workers: int, max_queue: int, timeout_seconds: float, max_tasks_per_child: int = 50):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.timeout_seconds = timeout_seconds
+        self.max_tasks_per_child = max_tasks_per_child
+        self.in_flight = 0
+        self._executor = None
+        self._restart_lock = threading.Lock()
+        self.metrics = {"submitted": 0, "completed": 0, "rejected": 0, "timeouts": 0,
+                        "failed": 0, "pool_restarts": 0, "busy_ms_total": 0.0}
+
+    @property
+    def capacity(self) -> int:
+        return self.workers + self.max_queue
+
+    def start(self):
+        kwargs = {}
+        if sys.version_info >= (3, 11):
+            kwargs["max_tasks_per_child"] = self.max_tasks_per_child
+        else:
+            logger.info("Python < 3.11: statement workers are not recycled (max_tasks_per_child unsupported).")
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            **kwargs
+        )
+
+    def shutdown(self):
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _restart(self, broken, reason: str = "broken", terminate: bool = False):
+        """
+        Replaces `broken` once; callers that saw the same broken pool later find it already replaced.
+        With terminate=True its worker processes are killed too (a hung job never returns on its own).
+        """
+        with self._restart_lock:
+            if self._executor is not broken:
+                return
+            logger.error(f"Statement worker pool {reason}; restarting it.")
+            processes = list((getattr(broken, "_processes", None) or {}).values()) if terminate else []
+            self.shutdown()
+            # No public way to stop running workers before Python 3.14's terminate_workers()
+            for process in processes:
+                process.terminate()
+            self.start()
+            self.metrics["pool_restarts"] += 1
+
+    def _release(self, job: dict):
+        """Frees the job's admission slot once, whichever comes first: completion or a recycled pool."""
+        if job["released"]:
+            return
+        job["released"] = True
+        self.in_flight -= 1
+        self.metrics["busy_ms_total"] += (time.perf_counter() - job["started"]) * 1000
+
+    @staticmethod
+    def _finished(future):
+        if not future.cancelled():
+            future.exception()   # mark retrieved: a timed-out job's caller is gone
+
+    async def run(self, fn, *args):
+        if self.in_flight >= self.capacity:
+            self.metrics["rejected"] += 1
+            raise PoolSaturated(f"{self.in_flight} statement jobs in flight (capacity {self.capacity})")
+        if self._executor is None:
+            self.start()
+
+        loop = asyncio.get_running_loop()
+        executor = self._executor
+        try:
+            future = loop.run_in_executor(executor, fn, *args)
+        except BrokenProcessPool:
+            self._restart(executor)
+            executor = self._executor
+            future = loop.run_in_executor(executor, fn, *args)
+
+        self.in_flight += 1
+        self.metrics["submitted"] += 1
+        job = {"started": time.perf_counter(), "released": False}
+        future.add_done_callback(lambda f: self._release(job))
+        future.add_done_callback(self._finished)
+
+        try:
+            result = await asyncio.wait_for(asyncio.shield(future), timeout=self.timeout_seconds)
+        except asyncio.TimeoutError:
+            self.metrics["timeouts"] += 1
+            # The worker is still busy with this job: recycle the pool so it can't hold the worker forever
+            self._restart(executor, reason=f"job exceeded {self.timeout_seconds:g}s", terminate=True)
+            self._release(job)
+            raise
+        except BrokenProcessPool:
+            self.metrics["failed"] += 1
+            self._restart(executor)
+            raise
+        except Exception:
+            self.metrics["failed"] += 1
+            raise
+        self.metrics["completed"] += 1
+        return result
+
+    def stats(self) -> dict:
+        return {**self.metrics, "busy_ms_total": round(self.metrics["busy_ms_total"], 1),
+                "workers": self.workers, "in_flight": self.in_flight, "capacity": self.capacity}
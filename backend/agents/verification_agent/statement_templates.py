@@ -0,0 +1,181 @@
+"""
+Bank-format templates for layout-aware statement parsing.
+
+The generic parser reads a line of text and takes its last amount, which on most Indian
+bank layouts is the running balance, then guesses debit/credit from keywords. A template
+knows the bank's table instead:
+
+- detect_template(first_page_text) fingerprints the issuing bank from page 1.
+- TemplateParser finds the header row in pdfplumber's word boxes, derives column bands
+  from the header positions, and reads every row by column. Withdrawal, deposit and
+  balance are therefore never confused, and direction comes from the column, not keywords.
+  Multi-line narrations are joined, and a header repeated on later pages re-derives the bands.
+
+Unknown banks, or a known bank whose header can't be found, use the generic path.
+"""
+import re
+from datetime import datetime
+from typing import Iterator, List, Optional
+
+ROW_TOLERANCE = 3.0   # points; words whose tops differ by less are on the same row
+AMOUNT_PATTERN = re.compile(r"^[-+]?\d[\d,]*\.\d{2}$")
+
+
+class StatementTemplate:
+    """
+    columns: left-to-right (field, header token) pairs. Fields other than date, narration,
+    withdrawal, deposit and balance (e.g. value_date, ref) are read and discarded; they
+    only need listing so their words don't fall into a neighbouring band.
+    """
+    def __init__(self, name: str, fingerprint: str, columns: List[tuple], date_formats: List[str]):
+        self.name = name
+        self.fingerprint = re.compile(fingerprint, re.IGNORECASE)
+        self.columns = columns
+        self.date_formats = date_formats
+
+    def parse_date(self, value: str) -> Optional[str]:
+        """Normalises the bank's date format to the 'dd/mm/yyyy' the rest of the pipeline uses."""
+        for fmt in self.date_formats:
+            try:
+                return datetime.strptime(value, fmt).strftime("%d/%m/%Y")
+            except ValueError:
+                continue
+        return None
+
+
+TEMPLATES = [
+    StatementTemplate(
+        "hdfc", r"\bHDFC\s+BANK\b",
+        [("date", "date"), ("narration", "narration"), ("ref", "chq"), ("value_date", "value"),
+         ("withdrawal", "withdrawal"), ("deposit", "deposit"), ("balance", "balance")],
+        ["%d/%m/%y", "%d/%m/%Y"]
+    ),
+    StatementTemplate(
+        "sbi", r"\bSTATE\s+BANK\s+OF\s+INDIA\b",
+        [("date", "date"), ("value_date", "date"), ("narration", "description"), ("ref", "ref"),
+         ("withdrawal", "debit"), ("deposit", "credit"), ("balance", "balance")],
+        ["%d %b %Y", "%d/%m/%Y", "%d-%m-%Y"]
+    ),
+    StatementTemplate(
+        "icici", r"\bICICI\s+BANK\b",
+        [("date", "date"), ("ref", "cheque"), ("narration", "remarks"),
+         ("withdrawal", "withdrawal"), ("deposit", "deposit"), ("balance", "balance")],
+        ["%d/%m/%Y", "%d-%m-%Y", "%d-%b-%Y"]
+    ),
+    StatementTemplate(
+        "axis", r"\bAXIS\s+BANK\b",
+        [("date", "date"), ("ref", "chq"), ("narration", "particulars"),
+         ("withdrawal", "debit"), ("deposit", "credit"), ("balance", "balance")],
+        ["%d-%m-%Y", "%d/%m/%Y"]
+    ),
+]
+
+
+def detect_template(first_page_text: str) -> Optional[StatementTemplate]:
+    for template in TEMPLATES:
+        if template.fingerprint.search(first_page_text):
+            return template
+    return None
+
+
+def group_rows(words: List[dict]) -> Iterator[List[dict]]:
+    """Clusters pdfplumber words into visual rows (top-to-bottom, each left-to-right)."""
+    row, row_top = [], None
+    for word in sorted(words, key=lambda w: (round(w["top"]), w["x0"])):
+        if row_top is not None and abs(word["top"] - row_top) > ROW_TOLERANCE:
+            yield sorted(row, key=lambda w: w["x0"])
+            row = []
+        if not row:
+            row_top = word["top"]
+        row.append(word)
+    if row:
+        yield sorted(row, key=lambda w: w["x0"])
+
+
+def parse_amount(value: str) -> Optional[float]:
+    """'1,234.56' / '1,234.56 Cr' / '1,234.56Dr' -> float (Dr negative); None if not an amount."""
+    value = value.strip()
+    sign = 1.0
+    if value[-2:].lower() in ("cr", "dr"):
+        sign = -1.0 if value[-2:].lower() == "dr" else 1.0
+        value = value[:-2].strip()
+    if not AMOUNT_PATTERN.match(value):
+        return None
+    return sign * float(value.replace(",", ""))
+
+
+class TemplateParser:
+    """Column-aware row reader for one statement; keeps state across pages."""
+    def __init__(self, template: StatementTemplate):
+        self.template = template
+        self.fields = [field for field, _ in template.columns]
+        self.bounds = None      # x-coordinates splitting adjacent column bands
+        self._pending = None    # last transaction, held back in case its narration wraps
+
+    def _header_bounds(self, row: List[dict]) -> Optional[List[float]]:
+        """Column band edges if this row is the template's header, else None."""
+        centres, start = [], 0
+        tokens = [w["text"].lower() for w in row]
+        for _, header_token in self.template.columns:
+            for i in range(start, len(row)):
+                if tokens[i].startswith(header_token):
+                    centres.append((row[i]["x0"] + row[i]["x1"]) / 2)
+                    start = i + 1
+                    break
+            else:
+                return None
+        return [(a + b) / 2 for a, b in zip(centres, centres[1:])]
+
+    def _split(self, row: List[dict]) -> dict:
+        cells = {field: [] for field in self.fields}
+        for word in row:
+            centre = (word["x0"] + word["x1"]) / 2
+            band = sum(centre > edge for edge in self.bounds)
+            cells[self.fields[band]].append(word["text"])
+        return {field: " ".join(parts) for field, parts in cells.items()}
+
+    def feed(self, words: List[dict]) -> Iterator[dict]:
+        """Yields completed transactions from one page's words."""
+        for row in group_rows(words):
+            bounds = self._header_bounds(row)
+            if bounds is not None:
+                yield from self.finish()
+                self.bounds = bounds
+                continue
+            if self.bounds is None:
+                continue   # still above the table
+
+            cells = self._split(row)
+            date = self.template.parse_date(cells["date"]) if cells["date"] else None
+            if date is None:
+                only_narration = cells["narration"] and not any(
+                    cells[f] for f in self.fields if f != "narration"
+                )
+                if self._pending is not None and only_narration:
+                    self._pending["description"] += " " + cells["narration"]
+                else:
+                    yield from self.finish()   # totals/footer row ends any wrapped narration
+                continue
+
+            withdrawal = parse_amount(cells["withdrawal"]) if cells["withdrawal"] else None
+            deposit = parse_amount(cells["deposit"]) if cells["deposit"] else None
+            if not withdrawal and not deposit:
+                yield from self.finish()
+                continue
+            balance = parse_amount(cells["balance"]) if cells["balance"] else None
+
+            yield from self.finish()
+            is_income = bool(deposit)
+            self._pending = {
+                "date": date,
+                "description": cells["narration"],
+                "amount": abs(deposit if is_income else withdrawal),
+                "type": "Income" if is_income else "Expense",
+                "balance": balance,
+            }
+
+    def finish(self) -> Iterator[dict]:
+        """Flushes the held-back transaction (end of statement or a non-continuation row)."""
+        if self._pending is not None:
+            tx, self._pending = self._pending, None
+            yield tx
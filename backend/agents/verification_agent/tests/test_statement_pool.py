@@ -0,0 +1,50 @@
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from statement_pool import PoolSaturated, StatementPool  # noqa: E402
+
+
+def test_timed_out_job_frees_its_worker_and_slot():
+    async def scenario():
+        pool = StatementPool(workers=1, max_queue=0, timeout_seconds=0.5)
+        pool.start()
+        try:
+            hung_executor = pool._executor
+            with pytest.raises(asyncio.TimeoutError):
+                await pool.run(time.sleep, 60)
+
+            assert pool.in_flight == 0
+            assert pool.metrics["timeouts"] == 1
+            assert pool.metrics["pool_restarts"] == 1
+            assert pool._executor is not hung_executor
+
+            # The only worker is usable again instead of being held by the sleeping job
+            assert await pool.run(pow, 2, 10) == 1024
+            assert pool.in_flight == 0
+        finally:
+            pool.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_admission_limit():
+    async def scenario():
+        pool = StatementPool(workers=1, max_queue=0, timeout_seconds=5)
+        pool.start()
+        try:
+            first = asyncio.ensure_future(pool.run(time.sleep, 0.5))
+            await asyncio.sleep(0)
+            with pytest.raises(PoolSaturated):
+                await pool.run(pow, 2, 2)
+            await first
+            assert pool.in_flight == 0
+        finally:
+            pool.shutdown()
+
+    asyncio.run(scenario())
@@ -0,0 +1,176 @@
+"""
+Columnar transaction store and vectorised financial-health scoring.
+
+Transactions are appended into typed column buffers as they stream out of the parser:
+    date ordinal (int32) | signed amount (float64, +in / -out) | category code (int8) | balance (float64, NaN if unknown)
+That is about 21 bytes per transaction instead of a dict per row. score() then computes the
+headline score plus monthly aggregates, income regularity, balance volatility and
+category spend in a single NumPy pass over those columns.
+"""
+import math
+from array import array
+from datetime import date
+
+import numpy as np
+
+# Category codes (index into CATEGORIES); income categories first
+SALARY, OTHER_INCOME, RENT, EMI, UTILITY, CASH_WITHDRAWAL, SHOPPING_FOOD, OTHER_EXPENSE = range(8)
+CATEGORIES = ["salary", "other_income", "rent", "emi", "utility", "cash_withdrawal", "shopping_food", "other_expense"]
+CATEGORY_KEYWORDS = [
+    (SALARY, ("salary",)),
+    (RENT, ("rent",)),
+    (EMI, ("emi", "loan")),
+    (UTILITY, ("utility", "electricity", "bill")),
+    (CASH_WITHDRAWAL, ("atm", "cash wdl", "withdrawal")),
+    (SHOPPING_FOOD, ("shopping", "food", "swiggy", "zomato", "amazon", "flipkart")),
+]
+UNIX_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def categorise(description: str, is_income: bool) -> int:
+    """Keyword category; "salary" wins on any line (as salary detection always has), spend categories only on debits."""
+    text = description.lower()
+    if "salary" in text:
+        return SALARY
+    if is_income:
+        return OTHER_INCOME
+    for code, keywords in CATEGORY_KEYWORDS[1:]:
+        if any(k in text for k in keywords):
+            return code
+    return OTHER_EXPENSE
+
+
+def date_ordinal(value: str) -> int:
+    """'dd/mm/yyyy' or 'dd-mm-yyyy' -> proleptic ordinal; 0 if not a real date."""
+    try:
+        return date(int(value[6:10]), int(value[3:5]), int(value[0:2])).toordinal()
+    except ValueError:
+        return 0
+
+
+class TransactionStore:
+    def __init__(self):
+        self._dates = array("i")
+        self._amounts = array("d")
+        self._categories = array("b")
+        self._balances = array("d")
+
+    def __len__(self):
+        return len(self._amounts)
+
+    def append(self, ordinal: int, signed_amount: float, category: int, balance: float = math.nan):
+        self._dates.append(ordinal)
+        self._amounts.append(signed_amount)
+        self._categories.append(category)
+        self._balances.append(balance)
+
+    def add(self, tx: dict):
+        """Adds one parsed transaction dict (date, description, amount, type[, balance])."""
+        is_income = tx["type"] == "Income"
+        amount = abs(tx["amount"])
+        self.append(
+            date_ordinal(tx["date"]),
+            amount if is_income else -amount,
+            categorise(tx["description"], is_income),
+            math.nan if tx.get("balance") is None else tx["balance"]
+        )
+
+    def columns(self) -> dict:
+        """Zero-copy NumPy views over the column buffers."""
+        return {
+            "dates": np.frombuffer(self._dates, dtype=np.int32) if self._dates else np.empty(0, np.int32),
+            "amounts": np.frombuffer(self._amounts, dtype=np.float64) if self._amounts else np.empty(0),
+            "categories": np.frombuffer(self._categories, dtype=np.int8) if self._categories else np.empty(0, np.int8),
+            "balances": np.frombuffer(self._balances, dtype=np.float64) if self._balances else np.empty(0),
+        }
+
+    def score(self):
+        """Calculates financial health score plus monthly/regularity/volatility insights."""
+        if not len(self):
+            return 0, {}
+        c = self.columns()
+        amounts, categories = c["amounts"], c["categories"]
+
+        inflow = np.where(amounts > 0, amounts, 0.0)
+        outflow = np.where(amounts > 0, 0.0, -amounts)
+        total_income = float(inflow.sum())
+        total_expenses = float(outflow.sum())
+        is_salary = categories == SALARY
+        has_salary = bool(is_salary.any())
+
+        # Headline score: same rule as before (salary presence + expense ratio)
+        income_stability_score = 20 if has_salary else 5
+        expense_ratio = total_expenses / total_income if total_income > 0 else 1.0
+        volatility_penalty = min(expense_ratio * 20, 30)
+        final_score = max(0, min(100, int(50 + income_stability_score - volatility_penalty)))
+
+        insights = {
+            "total_income": total_income,
+            "total_expenses": total_expenses,
+            "net_flow": total_income - total_expenses,
+            "salary_detected": has_salary,
+            "transaction_count": len(self),
+            "expense_ratio": round(expense_ratio, 4),
+            "spend_by_category": {
+                name: round(float(v), 2)
+                for name, v in zip(CATEGORIES, np.bincount(categories, weights=np.abs(amounts), minlength=len(CATEGORIES)))
+                if v
+            },
+        }
+        insights.update(self._monthly_insights(c, inflow, outflow, is_salary))
+        return final_score, insights
+
+    @staticmethod
+    def _monthly_insights(c: dict, inflow, outflow, is_salary) -> dict:
+        dated = c["dates"] > 0
+        if not dated.any():
+            return {}
+        days = (c["dates"][dated] - UNIX_EPOCH_ORDINAL).astype("datetime64[D]")
+        month_ids = days.astype("datetime64[M]").astype(np.int64)
+        first = month_ids.min()
+        idx = month_ids - first
+        n_months = int(idx.max()) + 1
+
+        monthly_in = np.bincount(idx, weights=inflow[dated], minlength=n_months)
+        monthly_out = np.bincount(idx, weights=outflow[dated], minlength=n_months)
+        salary_months = np.bincount(idx[is_salary[dated]], minlength=n_months) > 0
+        mean_in = monthly_in.mean()
+
+        # Month-end balance: the statement's own balance column when present, else running net flow
+        order = np.argsort(c["dates"][dated], kind="stable")
+        balances = c["balances"][dated][order]
+        has_balance = np.isfinite(balances).any()
+        running = balances if has_balance else np.cumsum((inflow - outflow)[dated][order])
+        if has_balance:
+            running = _forward_fill(running)
+        last_in_month = np.searchsorted(idx[order], np.arange(n_months), side="right") - 1
+        month_end = _forward_fill(np.where(last_in_month >= 0, running[np.maximum(last_in_month, 0)], np.nan))
+        month_end = month_end[np.isfinite(month_end)]
+        balance_volatility = (
+            float(month_end.std() / abs(month_end.mean())) if month_end.size > 1 and month_end.mean() else 0.0
+        )
+
+        labels = np.arange(first, first + n_months).astype("datetime64[M]").astype(str)
+        return {
+            "months_covered": n_months,
+            "avg_monthly_income": round(float(mean_in), 2),
+            "avg_monthly_expenses": round(float(monthly_out.mean()), 2),
+            "income_regularity": round(float(salary_months.mean()), 3),   # share of months with a salary credit
+            "income_variability": round(float(monthly_in.std() / mean_in), 3) if mean_in else 0.0,
+            "balance_volatility": round(balance_volatility, 3),
+            "balance_source": "statement" if has_balance else "derived",
+            "monthly": [
+                {"month": str(m), "income": round(float(i), 2), "expenses": round(float(o), 2)}
+                for m, i, o in zip(labels, monthly_in, monthly_out)
+            ],
+        }
+
+
+def _forward_fill(values: np.ndarray) -> np.ndarray:
+    """Carries the last finite value forward over NaNs (leading NaNs stay NaN)."""
+    valid = np.isfinite(values)
+    positions = np.where(valid, np.arange(values.size), 0)
+    np.maximum.accumulate(positions, out=positions)
+    filled = values[positions]
+    filled[~valid & (np.cumsum(valid) == 0)] = np.nan
+    return filled
@@ -43,6 +43,10 @@ def create_tables(conn):
         """)
         print("Created updated 'customers' table.")
 
+        # 2b. Customer ID sequence (CRM /register allocates CUST-<n> from it, collision-free)
+        cursor.execute("CREATE SEQUENCE IF NOT EXISTS customer_id_seq START 10000;")
+        print("Checked/Created 'customer_id_seq' sequence.")
+
         # 3. Create Loans Table (Kept as is)
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS loans (
@@ -116,6 +120,14 @@ def insert_customer_data(conn, customers):
             ))
             inserted_count += 1
         
+        # Keep newly allocated IDs clear of any seeded CUST-<n> IDs
+        cursor.execute("""
+            SELECT setval('customer_id_seq', GREATEST(
+                (SELECT last_value FROM customer_id_seq),
+                (SELECT COALESCE(MAX(substring(cust_id FROM '^CUST-([0-9]+)$')::bigint), 0) FROM customers)
+            ));
+        """)
+
         conn.commit()
         print(f"Successfully processed {inserted_count} customer records.")
     except psycopg2.Error as e:
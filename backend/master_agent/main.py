@@ -382,6 +382,7 @@ CRITICAL RULES - FOLLOW EXACTLY:
    - If user provides a bank statement file path, IMMEDIATELY call tool_analyze_bank_statement.
 9. DECISION - Based on underwriting status:
    - IF REJECTED: Explain the reason clearly (credit score, EMI affordability, etc.)
+     * If the result has a counter_offer, present its best_offer (amount, tenure_months, emi) as the maximum they can get. Do NOT re-run underwriting with guessed amounts.
      * Call tool_archive_rejection with rejection reason
    - IF APPROVED: Inform user of their FINAL terms:
      * Show: final_interest_rate (risk-adjusted)
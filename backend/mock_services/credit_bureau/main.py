@@ -1,67 +1,97 @@
 import psycopg2
+import psycopg2.extensions
 import os
+import sys
 import json
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
-from psycopg2.extras import RealDictCursor # To get rows as dictionaries
-
-app = FastAPI()
-
-# --- IMPORTANT: UPDATE THESE WITH YOUR POSTGRES DETAILS ---
-DATABASE_CONFIG = {
-    "dbname": "loan_chatbot_db",  # Replace with your database name
-    "user": "postgres", # Replace with your username
-    "password": "shreesha04", # Replace with your password
-    "host": "localhost",        # Often 'localhost' if running locally
-    "port": "5432"            # Default PostgreSQL port
-}
-# --- --- --- --- --- --- --- --- --- --- --- --- --- ---
-
-def get_db_connection():
-    """Establishes a connection to the PostgreSQL database."""
-    try:
-        # Use RealDictCursor to get results as dictionaries
-        conn = psycopg2.connect(**DATABASE_CONFIG, cursor_factory=RealDictCursor)
-        return conn
-    except psycopg2.Error as e:
-        print(f"Error connecting to database: {e}")
-        return None
+from typing import List
+
+# Shared pooled data-access layer lives one level up (backend/mock_services/mock_db.py)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import mock_db
+import customer_snapshot
+import fault_injection
+
+snapshot = customer_snapshot.CustomerSnapshot(["cust_id", "credit_score"])
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await asyncio.to_thread(snapshot.start)  # no-op unless MOCK_SNAPSHOT_MODE=1
+    yield
+    snapshot.stop()
+
+app = FastAPI(lifespan=lifespan)
+fault_injection.install(app, "credit_bureau")  # no-op unless MOCK_FAULTS_PATH or /admin/faults sets rules
+
+mock_db.prepare("bureau_score", "SELECT cust_id, credit_score FROM customers WHERE cust_id = $1")
+mock_db.prepare("bureau_scores_batch", "SELECT cust_id, credit_score FROM customers WHERE cust_id = ANY($1)")
+
+MAX_BATCH_SCORE_IDS = int(os.getenv("MAX_BATCH_SCORE_IDS", "5000"))
 
 class CreditScore(BaseModel):
     cust_id: str
     score: int # Field name in the Pydantic model
 
-@app.get("/credit_score", response_model=CreditScore)
-def get_credit_score(cust_id: str):
-    """Fetches customer credit score from the PostgreSQL database."""
-    conn = get_db_connection()
-    if not conn:
-        raise HTTPException(status_code=500, detail="Database connection error")
+class BatchCreditScoreRequest(BaseModel):
+    cust_ids: List[str]
 
-    cursor = None # Initialize cursor to None
+def fetch_score_row(cust_id: str):
     try:
-        cursor = conn.cursor()
-        # Select the correct column name from the DB ('credit_score')
-        # Use %s placeholder for psycopg2
-        cursor.execute("SELECT cust_id, credit_score FROM customers WHERE cust_id = %s", (cust_id,))
-        customer_row = cursor.fetchone() # Fetchone returns a dictionary now
+        with mock_db.connection() as conn:
+            return mock_db.query(conn, "bureau_score", (cust_id,), one=True)
     except psycopg2.Error as e:
         print(f"Database query error: {e}")
         raise HTTPException(status_code=500, detail="Database query error")
-    finally:
-        # Ensure cursor and connection are closed even if errors occurred
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
+
+@app.get("/credit_score", response_model=CreditScore)
+def get_credit_score(cust_id: str):
+    """Fetches customer credit score from the PostgreSQL database."""
+    customer_row = snapshot.lookup(cust_id, fetch_score_row)
 
     if customer_row:
-        # customer_row is already a dictionary thanks to RealDictCursor
         # Map DB column 'credit_score' to Pydantic field 'score'
         return CreditScore(cust_id=customer_row['cust_id'], score=customer_row['credit_score'])
     else:
         raise HTTPException(status_code=404, detail="Customer not found")
 
+@app.post("/credit_scores")
+def get_credit_scores(request: BatchCreditScoreRequest):
+    """
+    Resolves many credit scores with ONE set-based query on a pooled connection.
+    Returns a compact {cust_id: score} map; unknown IDs are listed under "missing".
+    """
+    cust_ids = mock_db.batch_ids(request.cust_ids, MAX_BATCH_SCORE_IDS)
+    if not cust_ids:
+        return {"scores": {}, "missing": []}
+
+    # Served from memory when the snapshot is ready; whatever it can't answer takes ONE query
+    found, unresolved = snapshot.lookup_many(cust_ids)
+    scores = {cid: row["credit_score"] for cid, row in found.items()}
+    if unresolved:
+        try:
+            with mock_db.connection() as conn:
+                # Plain tuple cursor: no per-row dict building for thousands of rows
+                rows = mock_db.query(conn, "bureau_scores_batch", (unresolved,),
+                                     cursor_factory=psycopg2.extensions.cursor)
+        except psycopg2.Error as e:
+            print(f"Database query error: {e}")
+            raise HTTPException(status_code=500, detail="Database query error")
+        scores.update(rows)
+
+    return {
+        "scores": scores,
+        "missing": [cid for cid in cust_ids if cid not in scores]
+    }
+
+@app.get("/metrics/db")
+def db_metrics(): return mock_db.stats()
+
+@app.get("/metrics/snapshot")
+def snapshot_metrics(): return snapshot.stats()
+
 # To run this service:
 # Ensure PostgreSQL is running and the table is populated
 # cd backend/mock_services/credit_bureau
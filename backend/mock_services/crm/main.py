@@ -1,12 +1,34 @@
 import psycopg2
 import os
-import random
-from fastapi import FastAPI, HTTPException
+import sys
+import threading
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
 from pydantic import BaseModel
-from psycopg2.extras import RealDictCursor
+from typing import List
 from fastapi.middleware.cors import CORSMiddleware
 
-app = FastAPI()
+# Shared pooled data-access layer lives one level up (backend/mock_services/mock_db.py)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import mock_db
+import http_cache
+import customer_snapshot
+import fault_injection
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await asyncio.to_thread(snapshot.start)  # no-op unless MOCK_SNAPSHOT_MODE=1
+    try:
+        await asyncio.to_thread(ensure_customer_id_sequence)
+    except Exception as e:
+        # Database not up yet: the first /register retries it
+        print(f"Customer ID sequence setup deferred: {e}")
+    yield
+    snapshot.stop()
+
+app = FastAPI(lifespan=lifespan)
+fault_injection.install(app, "crm")  # no-op unless MOCK_FAULTS_PATH or /admin/faults sets rules
 
 # --- 1. ALLOW REACT TO CONNECT ---
 app.add_middleware(
@@ -17,22 +39,43 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# --- 2. DATABASE CONFIG ---
-DATABASE_CONFIG = {
-    "dbname": "loan_chatbot_db",
-    "user": "postgres",
-    "password": "shreesha04",
-    "host": "localhost",
-    "port": "5432"
-}
-
-def get_db_connection():
-    try:
-        conn = psycopg2.connect(**DATABASE_CONFIG, cursor_factory=RealDictCursor)
-        return conn
-    except psycopg2.Error as e:
-        print(f"Error connecting to database: {e}")
-        return None
+# --- 2. DATABASE (pooled, hot lookups prepared once per connection) ---
+mock_db.prepare("crm_login", "SELECT cust_id, name, credit_score FROM customers WHERE cust_id = $1 AND password = $2")
+KYC_COLUMNS = ["cust_id", "name", "age", "phone", "address", "aadhaar", "credit_score", "category"]
+mock_db.prepare("crm_kyc", f"SELECT {', '.join(KYC_COLUMNS)} FROM customers WHERE cust_id = $1")
+# Optional in-memory copy of the KYC columns (MOCK_SNAPSHOT_MODE=1)
+snapshot = customer_snapshot.CustomerSnapshot(KYC_COLUMNS)
+
+# Customer IDs come from a sequence: CUST-10000, CUST-10001, ... never collide.
+# It starts above the legacy random CUST-1000..9999 range and is bumped past any existing ID.
+CUSTOMER_ID_SEQUENCE_DDL = """
+    CREATE SEQUENCE IF NOT EXISTS customer_id_seq START 10000;
+    SELECT setval('customer_id_seq', GREATEST(
+        (SELECT last_value FROM customer_id_seq),
+        (SELECT COALESCE(MAX(substring(cust_id FROM '^CUST-([0-9]+)$')::bigint), 0) FROM customers)
+    ));
+"""
+NEW_CUSTOMER_SCORE = 750
+NEW_CUSTOMER_CATEGORY = "New"
+MAX_BATCH_REGISTER = int(os.getenv("MAX_BATCH_REGISTER", "5000"))
+_id_sequence_ready = False
+_id_sequence_lock = threading.Lock()
+
+def ensure_customer_id_sequence():
+    """
+    Creates/aligns the ID sequence once per process (setup_postgres_db.py also creates it).
+    Runs in its own transaction, and the flag is set only after it commits, so a request
+    that later rolls back can't undo the CREATE SEQUENCE behind the flag.
+    """
+    global _id_sequence_ready
+    if _id_sequence_ready:
+        return
+    with _id_sequence_lock:
+        if not _id_sequence_ready:
+            with mock_db.connection() as conn:   # commits on exit
+                with conn.cursor() as cursor:
+                    cursor.execute(CUSTOMER_ID_SEQUENCE_DDL)
+            _id_sequence_ready = True
 
 # --- 3. DATA MODELS ---
 class LoginRequest(BaseModel):
@@ -48,6 +91,9 @@ class RegisterRequest(BaseModel):
     aadhar: str
     password: str
 
+class BatchRegisterRequest(BaseModel):
+    customers: List[RegisterRequest]
+
 # 🔹 NEW: KYC RESPONSE MODEL (optional but clean)
 class KYCResponse(BaseModel):
     custId: str
@@ -63,112 +109,145 @@ class KYCResponse(BaseModel):
 
 @app.post("/login")
 def login_user(creds: LoginRequest):
-    conn = get_db_connection()
-    if not conn:
-        raise HTTPException(status_code=500, detail="Database connection error")
-    
-    try:
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT cust_id, name, credit_score FROM customers WHERE cust_id = %s AND password = %s", 
-            (creds.custId, creds.password)
-        )
-        user = cursor.fetchone()
-        
-        if user:
-            return {
-                "status": "success", 
-                "name": user['name'], 
-                "custId": user['cust_id'],
-                "credit_score": user['credit_score']
-            }
-        else:
-            raise HTTPException(status_code=401, detail="Invalid credentials")
-    finally:
-        if conn:
-            conn.close()
+    with mock_db.connection() as conn:
+        user = mock_db.query(conn, "crm_login", (creds.custId, creds.password), one=True)
+
+    if user:
+        return {
+            "status": "success", 
+            "name": user['name'], 
+            "custId": user['cust_id'],
+            "credit_score": user['credit_score']
+        }
+    else:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
 
 @app.post("/register")
 def register_user(user: RegisterRequest):
-    conn = get_db_connection()
-    if not conn:
-        raise HTTPException(status_code=500, detail="Database connection error")
+    try:
+        age = int(user.age)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Age must be a whole number.")
 
     try:
-        cursor = conn.cursor()
-        
-        new_cust_id = f"CUST-{random.randint(1000, 9999)}"
-        full_address = f"{user.address}, {user.city}"
-
-        query = """
-            INSERT INTO customers (cust_id, password, name, age, phone, address, aadhaar, credit_score, category)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-            RETURNING cust_id
-        """
-        
-        values = (
-            new_cust_id, 
-            user.password, 
-            user.name, 
-            int(user.age), 
-            user.phone, 
-            full_address,
-            user.aadhar,
-            750,
-            "New"
-        )
-        
-        cursor.execute(query, values)
-        conn.commit()
-        
+        ensure_customer_id_sequence()
+        with mock_db.connection() as conn:
+            cursor = conn.cursor()
+
+            full_address = f"{user.address}, {user.city}"
+
+            query = """
+                INSERT INTO customers (cust_id, password, name, age, phone, address, aadhaar, credit_score, category)
+                VALUES ('CUST-' || nextval('customer_id_seq'), %s, %s, %s, %s, %s, %s, %s, %s)
+                RETURNING cust_id
+            """
+
+            values = (
+                user.password, 
+                user.name, 
+                age, 
+                user.phone, 
+                full_address,
+                user.aadhar,
+                NEW_CUSTOMER_SCORE,
+                NEW_CUSTOMER_CATEGORY
+            )
+
+            cursor.execute(query, values)
+            new_cust_id = cursor.fetchone()["cust_id"]
+
         return {"status": "success", "custId": new_cust_id}
 
     except psycopg2.Error as e:
-        conn.rollback()
+        # mock_db.connection() has already rolled the transaction back
         print(f"Registration error: {e}")
         raise HTTPException(status_code=500, detail="Registration failed. Check server logs.")
-    finally:
-        if conn:
-            conn.close()
 
-# 🔹 NEW: ENDPOINT USED BY VERIFICATION AGENT
-@app.get("/crm/{customer_id}", response_model=KYCResponse)
-def get_customer_kyc(customer_id: str):
+@app.post("/register/batch")
+def register_users_batch(request: BatchRegisterRequest):
     """
-    This is what your verification agent calls:
-    GET http://127.0.0.1:9001/crm/{customer_id}
+    Onboards many customers in one transaction with two set-based statements:
+    allocate N IDs from the sequence, then INSERT ... SELECT FROM unnest(column arrays).
+    Returns custIds in the same order as the input. All-or-nothing.
     """
-    conn = get_db_connection()
-    if not conn:
-        raise HTTPException(status_code=500, detail="Database connection error")
+    users = request.customers
+    if len(users) > MAX_BATCH_REGISTER:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many customers ({len(users)}). Max per call is {MAX_BATCH_REGISTER}."
+        )
+    if not users:
+        return {"status": "success", "count": 0, "custIds": []}
+
+    bad_ages = [i for i, u in enumerate(users) if not u.age.strip().isdigit()]
+    if bad_ages:
+        raise HTTPException(status_code=400, detail=f"Age must be a whole number (rows {bad_ages[:20]}).")
 
     try:
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            SELECT cust_id, name, age, phone, address, aadhaar, credit_score, category
-            FROM customers
-            WHERE cust_id = %s
-            """,
-            (customer_id,)
-        )
-        row = cursor.fetchone()
+        ensure_customer_id_sequence()
+        with mock_db.connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    "SELECT 'CUST-' || nextval('customer_id_seq') AS cust_id FROM generate_series(1, %s)",
+                    (len(users),)
+                )
+                new_ids = [row["cust_id"] for row in cursor.fetchall()]
+                cursor.execute(
+                    """
+                    INSERT INTO customers (cust_id, password, name, age, phone, address, aadhaar, credit_score, category)
+                    SELECT t.cust_id, t.password, t.name, t.age, t.phone, t.address, t.aadhaar, %s, %s
+                    FROM unnest(%s::text[], %s::text[], %s::text[], %s::int[], %s::text[], %s::text[], %s::text[])
+                        AS t(cust_id, password, name, age, phone, address, aadhaar)
+                    """,
+                    (
+                        NEW_CUSTOMER_SCORE, NEW_CUSTOMER_CATEGORY,
+                        new_ids,
+                        [u.password for u in users],
+                        [u.name for u in users],
+                        [int(u.age) for u in users],
+                        [u.phone for u in users],
+                        [f"{u.address}, {u.city}" for u in users],
+                        [u.aadhar for u in users],
+                    )
+                )
+        return {"status": "success", "count": len(new_ids), "custIds": new_ids}
 
-        if not row:
-            raise HTTPException(status_code=404, detail="Customer not found")
+    except psycopg2.Error as e:
+        print(f"Batch registration error: {e}")
+        raise HTTPException(status_code=500, detail="Batch registration failed. Check server logs.")
 
-        # Map DB row -> API response
-        return {
-            "custId": row["cust_id"],
-            "name": row["name"],
-            "age": row["age"],
-            "phone": row["phone"],
-            "address": row["address"],
-            "aadhaar": row["aadhaar"],
-            "credit_score": row.get("credit_score"),
-            "category": row.get("category"),
-        }
+def fetch_kyc_row(customer_id: str):
+    with mock_db.connection() as conn:
+        return mock_db.query(conn, "crm_kyc", (customer_id,), one=True)
 
-    finally:
-        if conn:
-            conn.close()
+# 🔹 NEW: ENDPOINT USED BY VERIFICATION AGENT
+@app.get("/crm/{customer_id}", response_model=KYCResponse)
+def get_customer_kyc(customer_id: str, request: Request):
+    """
+    This is what your verification agent calls:
+    GET http://127.0.0.1:9001/crm/{customer_id}
+    Sends an ETag; a matching If-None-Match gets a 304 with no body.
+    """
+    row = snapshot.lookup(customer_id, fetch_kyc_row)
+
+    if not row:
+        raise HTTPException(status_code=404, detail="Customer not found")
+
+    # Map DB row -> API response (validated against KYCResponse before it is hashed)
+    kyc = KYCResponse(**{
+        "custId": row["cust_id"],
+        "name": row["name"],
+        "age": row["age"],
+        "phone": row["phone"],
+        "address": row["address"],
+        "aadhaar": row["aadhaar"],
+        "credit_score": row.get("credit_score"),
+        "category": row.get("category"),
+    })
+    return http_cache.conditional_json(request, kyc)
+
+@app.get("/metrics/db")
+def db_metrics(): return mock_db.stats()
+
+@app.get("/metrics/snapshot")
+def snapshot_metrics(): return snapshot.stats()
@@ -0,0 +1,194 @@
+"""
+Optional in-memory snapshot of the `customers` table for the mock services' hot lookups.
+
+With MOCK_SNAPSHOT_MODE=1 a service loads the columns it serves into a dict of tuples at
+startup and answers primary-key lookups from memory. A background thread keeps it fresh:
+
+- An AFTER INSERT/UPDATE/DELETE trigger on `customers` sends pg_notify('customers_changed',
+  cust_id). It is installed at startup only if missing (no DDL or locks once it exists).
+- The listener thread LISTENs *before* the initial load, so no change can slip between
+  load and subscribe. Every batch of notifications is coalesced and re-read with one
+  `cust_id = ANY(...)` query. Rows that no longer exist are dropped.
+- If the listen connection drops, the snapshot is marked not ready. Lookups then fall back
+  to the database until the thread has reconnected and done a full reload.
+"""
+import os
+import select
+import threading
+import time
+from typing import Callable, List, Optional
+
+import psycopg2
+
+from mock_db import DATABASE_CONFIG
+
+SNAPSHOT_MODE = os.getenv("MOCK_SNAPSHOT_MODE", "0") == "1"
+SNAPSHOT_READY_TIMEOUT_SECONDS = float(os.getenv("MOCK_SNAPSHOT_READY_TIMEOUT_SECONDS", "10"))
+CHANNEL = "customers_changed"
+RECONNECT_BACKOFF_SECONDS = 2.0
+
+TRIGGER_EXISTS_SQL = """
+SELECT 1 FROM pg_trigger WHERE tgname = 'customers_notify' AND tgrelid = 'customers'::regclass
+"""
+
+# Only runs when the trigger is missing; the advisory lock + re-check make concurrent starts safe
+TRIGGER_DDL = f"""
+SELECT pg_advisory_xact_lock(hashtext('customers_notify_trigger'));
+CREATE OR REPLACE FUNCTION notify_customer_change() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        PERFORM pg_notify('{CHANNEL}', OLD.cust_id);
+    ELSE
+        PERFORM pg_notify('{CHANNEL}', NEW.cust_id);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_trigger
+                   WHERE tgname = 'customers_notify' AND tgrelid = 'customers'::regclass) THEN
+        CREATE TRIGGER customers_notify AFTER INSERT OR UPDATE OR DELETE ON customers
+            FOR EACH ROW EXECUTE FUNCTION notify_customer_change();
+    END IF;
+END;
+$$;
+"""
+
+
+class CustomerSnapshot:
+    def __init__(self, columns: List[str], enabled: bool = SNAPSHOT_MODE):
+        if columns[0] != "cust_id":
+            raise ValueError("Snapshot columns must start with cust_id")
+        self.columns = columns
+        self.enabled = enabled
+        self.ready = False
+
+        self._rows = {}  # cust_id -> tuple of `columns`
+        self._select = f"SELECT {', '.join(columns)} FROM customers"
+        self._stop = threading.Event()
+        self._ready_event = threading.Event()
+        self._thread = None
+        self.metrics = {"hits": 0, "misses": 0, "fallbacks": 0, "full_loads": 0,
+                        "notifications": 0, "refreshes": 0, "reconnects": 0, "last_load_ms": 0.0}
+
+    # --- Lifecycle ---
+    def start(self):
+        """Starts the listener and waits (bounded) for the first full load."""
+        if not self.enabled:
+            return
+        self._thread = threading.Thread(target=self._listen_loop, name="customer-snapshot", daemon=True)
+        self._thread.start()
+        if not self._ready_event.wait(SNAPSHOT_READY_TIMEOUT_SECONDS):
+            print("Customer snapshot not ready yet; serving from the database meanwhile.")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    # --- Read path ---
+    def lookup(self, cust_id: str, fallback: Callable[[str], Optional[dict]]) -> Optional[dict]:
+        """Row as a dict from memory when ready (None = no such customer), else `fallback(cust_id)`."""
+        if not self.ready:
+            if self.enabled:
+                self.metrics["fallbacks"] += 1
+            return fallback(cust_id)
+        row = self._rows.get(cust_id)
+        if row is None:
+            self.metrics["misses"] += 1
+            return None
+        self.metrics["hits"] += 1
+        return dict(zip(self.columns, row))
+
+    def lookup_many(self, cust_ids: List[str]):
+        """
+        ({cust_id: row dict} found in memory, [cust_ids left unresolved]). IDs are unresolved
+        when the snapshot isn't ready, including if it drops mid-call; the caller fetches them
+        all with one set-based query instead of a fallback per ID.
+        """
+        found, unresolved = {}, []
+        for i, cust_id in enumerate(cust_ids):
+            if not self.ready:
+                unresolved = list(cust_ids[i:])
+                if self.enabled:
+                    self.metrics["fallbacks"] += len(unresolved)
+                break
+            row = self._rows.get(cust_id)
+            if row is None:
+                self.metrics["misses"] += 1
+            else:
+                self.metrics["hits"] += 1
+                found[cust_id] = dict(zip(self.columns, row))
+        return found, unresolved
+
+    # --- Listener thread ---
+    def _listen_loop(self):
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = psycopg2.connect(**DATABASE_CONFIG)
+                conn.autocommit = True
+                self._ensure_trigger(conn)
+                with conn.cursor() as cursor:
+                    cursor.execute(f"LISTEN {CHANNEL}")
+                self._load_all(conn)  # after LISTEN: changes during the load are queued, not lost
+
+                while not self._stop.is_set():
+                    if select.select([conn], [], [], 1.0) == ([], [], []):
+                        continue
+                    conn.poll()
+                    changed = {note.payload for note in conn.notifies}
+                    self.metrics["notifications"] += len(conn.notifies)
+                    conn.notifies.clear()
+                    if changed:
+                        self._refresh(conn, changed)
+            except psycopg2.Error as e:
+                self.ready = False
+                self.metrics["reconnects"] += 1
+                print(f"Customer snapshot listener error: {e}; retrying in {RECONNECT_BACKOFF_SECONDS}s")
+                self._stop.wait(RECONNECT_BACKOFF_SECONDS)
+            finally:
+                if conn is not None:
+                    conn.close()
+        self.ready = False
+
+    def _ensure_trigger(self, conn):
+        with conn.cursor() as cursor:
+            cursor.execute(TRIGGER_EXISTS_SQL)
+            if cursor.fetchone():
+                return
+        # Advisory lock serialises the DDL when several services start together
+        conn.autocommit = False
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(TRIGGER_DDL)
+            conn.commit()
+        finally:
+            conn.autocommit = True
+
+    def _load_all(self, conn):
+        start = time.perf_counter()
+        with conn.cursor() as cursor:
+            cursor.execute(self._select)
+            rows = {row[0]: tuple(row) for row in cursor}
+        self._rows = rows  # swap in one step; readers never see a half-built index
+        self.ready = True
+        self._ready_event.set()
+        self.metrics["full_loads"] += 1
+        self.metrics["last_load_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        print(f"Customer snapshot loaded: {len(rows)} rows in {self.metrics['last_load_ms']}ms")
+
+    def _refresh(self, conn, cust_ids: set):
+        with conn.cursor() as cursor:
+            cursor.execute(f"{self._select} WHERE cust_id = ANY(%s)", (list(cust_ids),))
+            fresh = {row[0]: tuple(row) for row in cursor}
+        for cust_id in cust_ids:
+            if cust_id in fresh:
+                self._rows[cust_id] = fresh[cust_id]
+            else:
+                self._rows.pop(cust_id, None)
+        self.metrics["refreshes"] += 1
+
+    def stats(self) -> dict:
+        return {**self.metrics, "enabled": self.enabled, "ready": self.ready, "rows": len(self._rows)}
@@ -0,0 +1,225 @@
+"""
+Latency and fault injection for the mock services.
+
+Lets load tests reproduce slow or flaky downstream behaviour (bureau tail latency, 5xx
+bursts, hung requests, throttling) on a laptop. Rules are per route and come from a JSON
+file (MOCK_FAULTS_PATH) and/or the admin endpoints. With no rules, the middleware is a
+pass-through.
+
+Config file: {"<service>": {"<path glob>": rule, ...}, ...}   e.g.
+    {"credit_bureau": {"/credit_score": {"latency": {"distribution": "lognormal", "p50_ms": 40, "p99_ms": 900},
+                                        "error_rate": 0.02, "throttle": {"max_rps": 50}}}}
+
+Rule fields (all optional):
+    latency        fixed {ms} | uniform {min_ms, max_ms} | normal {mean_ms, std_ms}
+                   | exponential {mean_ms} | lognormal {p50_ms, p99_ms}
+    error_rate     probability of answering `error_status` (default 500) instead
+    timeout_rate   probability of hanging for `timeout_seconds` (default 30) and answering 504
+    throttle       {"rate": p} and/or {"max_rps": n}; throttled calls get 429 + Retry-After
+    methods        restrict the rule to these HTTP methods
+Rules are validated against FaultRule (unknown fields rejected); a bad PUT gets a 422.
+
+Admin endpoints (never faulted): GET/PUT/DELETE /admin/faults, GET /admin/faults/metrics.
+"""
+import asyncio
+import fnmatch
+import json
+import math
+import os
+import random
+import time
+from typing import Dict, List, Literal, Optional
+
+from fastapi import Body, FastAPI
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+
+ADMIN_PREFIX = "/admin/faults"
+Z_99 = 2.3263  # standard normal 99th percentile, to fit a lognormal from p50/p99
+# Fields each latency distribution needs (see LatencySpec)
+LATENCY_FIELDS = {
+    "fixed": (), "uniform": ("min_ms", "max_ms"), "normal": ("mean_ms", "std_ms"),
+    "exponential": ("mean_ms",), "lognormal": ("p50_ms", "p99_ms"),
+}
+
+
+class LatencySpec(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+    distribution: Literal["fixed", "uniform", "normal", "exponential", "lognormal"] = "fixed"
+    ms: float = Field(0, ge=0)
+    min_ms: Optional[float] = Field(None, ge=0)
+    max_ms: Optional[float] = Field(None, ge=0)
+    mean_ms: Optional[float] = Field(None, gt=0)
+    std_ms: Optional[float] = Field(None, ge=0)
+    p50_ms: Optional[float] = Field(None, gt=0)
+    p99_ms: Optional[float] = Field(None, gt=0)
+
+    @model_validator(mode="after")
+    def _check_distribution(self):
+        missing = [f for f in LATENCY_FIELDS[self.distribution] if getattr(self, f) is None]
+        if missing:
+            raise ValueError(f"{self.distribution} latency needs {', '.join(missing)}")
+        return self
+
+
+class ThrottleSpec(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+    rate: float = Field(0.0, ge=0, le=1)
+    max_rps: Optional[float] = Field(None, gt=0)
+    retry_after_seconds: int = Field(1, ge=0)   # Retry-After takes whole seconds
+
+
+class FaultRule(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+    latency: Optional[LatencySpec] = None
+    error_rate: float = Field(0.0, ge=0, le=1)
+    error_status: int = Field(500, ge=400, le=599)
+    timeout_rate: float = Field(0.0, ge=0, le=1)
+    timeout_seconds: float = Field(30, ge=0)
+    throttle: Optional[ThrottleSpec] = None
+    methods: Optional[List[str]] = None
+
+
+def validate_rules(rules: Dict[str, object]) -> Dict[str, dict]:
+    """Validated copy of a rule set as plain dicts (only the fields given). Raises ValidationError."""
+    return {
+        pattern: FaultRule.model_validate(rule).model_dump(exclude_unset=True, exclude_none=True)
+        for pattern, rule in rules.items()
+    }
+
+
+def sample_latency_ms(spec: Optional[dict], rng: random.Random) -> float:
+    if not spec:
+        return 0.0
+    kind = spec.get("distribution", "fixed")
+    if kind == "fixed":
+        value = spec.get("ms", 0)
+    elif kind == "uniform":
+        value = rng.uniform(spec["min_ms"], spec["max_ms"])
+    elif kind == "normal":
+        value = rng.gauss(spec["mean_ms"], spec["std_ms"])
+    elif kind == "exponential":
+        value = rng.expovariate(1.0 / spec["mean_ms"])
+    elif kind == "lognormal":
+        mu = math.log(spec["p50_ms"])
+        sigma = max(math.log(spec["p99_ms"]) - mu, 0.0) / Z_99
+        value = rng.lognormvariate(mu, sigma)
+    else:
+        raise ValueError(f"Unknown latency distribution: {kind}")
+    return max(float(value), 0.0)
+
+
+class _TokenBucket:
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+
+    def take(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class FaultInjector:
+    def __init__(self, service: str, rules: Dict[str, dict] = None, seed: int = None):
+        self.service = service
+        self.rng = random.Random(seed)
+        self.metrics = {}
+        self.set_rules(rules or {})
+
+    def set_rules(self, rules: Dict[str, dict]):
+        rules = validate_rules(rules)
+        buckets = {
+            pattern: _TokenBucket(float(rule["throttle"]["max_rps"]))
+            for pattern, rule in rules.items() if (rule.get("throttle") or {}).get("max_rps")
+        }
+        self.rules, self._buckets = rules, buckets
+
+    def match(self, method: str, path: str):
+        for pattern, rule in self.rules.items():
+            if fnmatch.fnmatchcase(path, pattern) and method in rule.get("methods", [method]):
+                return pattern, rule
+        return None, None
+
+    def _count(self, pattern: str, outcome: str):
+        counts = self.metrics.setdefault(pattern, {})
+        counts[outcome] = counts.get(outcome, 0) + 1
+
+    async def apply(self, method: str, path: str) -> Optional[JSONResponse]:
+        """Sleeps for the injected latency; returns a fault response or None to proceed."""
+        pattern, rule = self.match(method, path)
+        if rule is None:
+            return None
+        self._count(pattern, "requests")
+
+        throttle = rule.get("throttle") or {}
+        bucket = self._buckets.get(pattern)
+        if (bucket and not bucket.take()) or self.rng.random() < throttle.get("rate", 0.0):
+            self._count(pattern, "throttled")
+            retry_after = str(throttle.get("retry_after_seconds", 1))
+            return JSONResponse({"detail": "Too many requests (injected)"}, status_code=429,
+                                headers={"Retry-After": retry_after})
+
+        if self.rng.random() < rule.get("timeout_rate", 0.0):
+            self._count(pattern, "timeouts")
+            await asyncio.sleep(rule.get("timeout_seconds", 30))
+            return JSONResponse({"detail": "Upstream timeout (injected)"}, status_code=504)
+
+        delay_ms = sample_latency_ms(rule.get("latency"), self.rng)
+        if delay_ms:
+            await asyncio.sleep(delay_ms / 1000.0)
+
+        if self.rng.random() < rule.get("error_rate", 0.0):
+            self._count(pattern, "errors")
+            return JSONResponse({"detail": "Internal error (injected)"}, status_code=rule.get("error_status", 500))
+        return None
+
+
+def load_rules(service: str, path: str = None) -> Dict[str, dict]:
+    """This service's section of the fault config file; empty if unset or missing."""
+    path = path or os.getenv("MOCK_FAULTS_PATH")
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f).get(service, {})
+
+
+def install(app: FastAPI, service: str) -> FaultInjector:
+    """Adds the fault middleware and admin endpoints to a mock service app."""
+    seed = os.getenv("MOCK_FAULTS_SEED")
+    injector = FaultInjector(service, load_rules(service), seed=int(seed) if seed else None)
+
+    @app.middleware("http")
+    async def inject_faults(request, call_next):
+        path = request.url.path
+        if injector.rules and not path.startswith(ADMIN_PREFIX):
+            fault = await injector.apply(request.method, path)
+            if fault is not None:
+                return fault
+        return await call_next(request)
+
+    @app.get(ADMIN_PREFIX)
+    def get_faults(): return {"service": service, "rules": injector.rules}
+
+    @app.put(ADMIN_PREFIX)
+    def put_faults(rules: Dict[str, FaultRule] = Body(...)):
+        # Already validated by FastAPI (422 on bad input); keep only the fields that were sent
+        injector.set_rules({pattern: rule.model_dump(exclude_unset=True, exclude_none=True)
+                            for pattern, rule in rules.items()})
+        injector.metrics.clear()
+        return {"service": service, "rules": injector.rules}
+
+    @app.delete(ADMIN_PREFIX)
+    def clear_faults():
+        injector.set_rules({})
+        return {"service": service, "rules": {}}
+
+    @app.get(f"{ADMIN_PREFIX}/metrics")
+    def fault_metrics(): return injector.metrics
+
+    return injector
@@ -0,0 +1,43 @@
+"""
+HTTP caching semantics for the mock services' read endpoints.
+
+`conditional_json()` returns a JSON response carrying a strong ETag (sha256 of the canonical
+JSON body) and a Cache-Control header. If the client's If-None-Match already names that
+ETag, the body is dropped and the response becomes a 304. Repeat reads then cost a header
+exchange instead of a full body.
+
+Cache-Control is `private` (customer data must not sit in shared caches). With the
+default MOCK_CACHE_MAX_AGE_SECONDS=0 it is `no-cache`, so clients may keep the body but
+revalidate on every use.
+"""
+import hashlib
+import json
+import os
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+MOCK_CACHE_MAX_AGE_SECONDS = int(os.getenv("MOCK_CACHE_MAX_AGE_SECONDS", "0"))
+
+
+def cache_control(max_age: int = MOCK_CACHE_MAX_AGE_SECONDS) -> str:
+    return f"private, max-age={max_age}" if max_age > 0 else "private, no-cache"
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    # If-None-Match uses weak comparison (RFC 9110 13.1.2): W/"x" matches "x"
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def conditional_json(request: Request, payload, max_age: int = MOCK_CACHE_MAX_AGE_SECONDS) -> Response:
+    body = json.dumps(jsonable_encoder(payload), separators=(",", ":"), sort_keys=True).encode("utf-8")
+    etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+    headers = {"ETag": etag, "Cache-Control": cache_control(max_age)}
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
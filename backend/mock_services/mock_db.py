@@ -0,0 +1,199 @@
+"""
+Shared pooled data-access layer for the mock services (CRM, offer mart, credit bureau).
+
+- One psycopg2 ThreadedConnectionPool per process, created lazily on first use and sized
+  to FastAPI's worker threadpool: every sync `def` handler runs on one of those threads,
+  so a handler can always get a connection without the pool being the bottleneck.
+- Hot lookups are registered once with `prepare()` and run with `query()`. They are
+  PREPAREd server-side on each pooled connection the first time that connection runs
+  them, so planning happens once per connection instead of once per request.
+- `batch_ids()` validates the ID list of a batch endpoint (dedupe + size limit).
+- `stats()` exposes pool metrics (checkouts, waits, timeouts, prepared executions). Open,
+  checked-out and idle counts are tracked here, not read from the pool's internals.
+
+Services import this module by adding backend/mock_services to sys.path (each one is
+started from its own directory with `uvicorn main:app`).
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import List
+
+import psycopg2
+import psycopg2.extensions
+import psycopg2.pool
+from fastapi import HTTPException
+from psycopg2.extras import RealDictCursor
+
+DATABASE_CONFIG = {
+    "dbname": os.getenv("DB_NAME", "loan_chatbot_db"),
+    "user": os.getenv("DB_USER", "postgres"),
+    "password": os.getenv("DB_PASSWORD", "shreesha04"),
+    "host": os.getenv("DB_HOST", "localhost"),
+    "port": os.getenv("DB_PORT", "5432")
+}
+
+# AnyIO (which FastAPI uses for sync handlers) runs them on at most 40 threads by default
+WORKER_THREADS = 40
+DB_POOL_MIN_CONNECTIONS = int(os.getenv("DB_POOL_MIN_CONNECTIONS", "2"))
+DB_POOL_MAX_CONNECTIONS = int(os.getenv("DB_POOL_MAX_CONNECTIONS", str(WORKER_THREADS)))
+DB_POOL_TIMEOUT_SECONDS = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "5"))
+
+
+class PreparingConnection(psycopg2.extensions.connection):
+    """Connection that remembers which named statements it has already PREPAREd."""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared = set()
+        self._counted = True
+        _count("open_connections")
+
+    def uncount(self):
+        """Removes this connection from open_connections (idempotent)."""
+        if self._counted:
+            self._counted = False
+            _count("open_connections", -1)
+
+    def close(self):
+        # The pool closes surplus idle connections itself; count those too
+        self.uncount()
+        super().close()
+
+
+# name -> (sql with $1..$n placeholders, number of parameters)
+_statements = {}
+
+_pool = None
+_pool_lock = threading.Lock()
+# ThreadedConnectionPool raises instead of blocking when exhausted; the semaphore makes callers queue
+_slots = threading.BoundedSemaphore(DB_POOL_MAX_CONNECTIONS)
+_metrics_lock = threading.Lock()
+_metrics = {
+    "open_connections": 0, "checkouts": 0, "in_use": 0, "peak_in_use": 0, "waits": 0,
+    "wait_ms_total": 0.0, "timeouts": 0, "connect_errors": 0, "discarded": 0, "prepares": 0, "prepared_executions": 0
+}
+
+
+def _count(key: str, amount=1):
+    with _metrics_lock:
+        _metrics[key] += amount
+
+
+def get_pool():
+    """Lazily creates the process-wide pool. Returns None if the database is unreachable."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                try:
+                    _pool = psycopg2.pool.ThreadedConnectionPool(
+                        DB_POOL_MIN_CONNECTIONS, DB_POOL_MAX_CONNECTIONS,
+                        connection_factory=PreparingConnection,
+                        cursor_factory=RealDictCursor,
+                        **DATABASE_CONFIG
+                    )
+                except psycopg2.Error as e:
+                    _count("connect_errors")
+                    print(f"Error connecting to database: {e}")
+                    return None
+    return _pool
+
+
+@contextmanager
+def connection():
+    """
+    Borrows a pooled connection for the duration of the block. Commits on success and
+    rolls back on error. Raises HTTPException 500 if the database is unreachable and
+    503 if no connection frees up within DB_POOL_TIMEOUT_SECONDS.
+    """
+    pool = get_pool()
+    if not pool:
+        raise HTTPException(status_code=500, detail="Database connection error")
+
+    start = time.perf_counter()
+    if not _slots.acquire(blocking=False):
+        _count("waits")
+        if not _slots.acquire(timeout=DB_POOL_TIMEOUT_SECONDS):
+            _count("timeouts")
+            raise HTTPException(status_code=503, detail="Database pool exhausted")
+        _count("wait_ms_total", (time.perf_counter() - start) * 1000)
+
+    conn = None
+    broken = False
+    try:
+        try:
+            conn = pool.getconn()
+        except psycopg2.Error as e:
+            _count("connect_errors")
+            print(f"Error connecting to database: {e}")
+            raise HTTPException(status_code=500, detail="Database connection error")
+        with _metrics_lock:
+            _metrics["checkouts"] += 1
+            _metrics["in_use"] += 1
+            _metrics["peak_in_use"] = max(_metrics["peak_in_use"], _metrics["in_use"])
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            if not conn.closed:
+                conn.rollback()
+            raise
+    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+        broken = True  # server restarted / connection dropped: don't hand it out again
+        raise
+    finally:
+        if conn is not None:
+            _count("in_use", -1)
+            if broken or conn.closed:
+                _count("discarded")
+                conn.uncount()   # already-closed connections are dropped by the pool without close()
+            pool.putconn(conn, close=broken or bool(conn.closed))
+        _slots.release()
+
+
+def batch_ids(ids: List[str], max_ids: int) -> List[str]:
+    """
+    IDs for one set-based ANY(...) lookup: empties dropped, de-duplicated in the caller's
+    order. Raises HTTPException 400 above `max_ids`, which keeps the array and response size sane.
+    """
+    unique = list(dict.fromkeys(i for i in ids if i))
+    if len(unique) > max_ids:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many customer IDs ({len(unique)}). Max per call is {max_ids}."
+        )
+    return unique
+
+
+def prepare(name: str, sql: str):
+    """Registers a hot lookup. `sql` uses PostgreSQL $1..$n placeholders."""
+    n_params = 0
+    while f"${n_params + 1}" in sql:
+        n_params += 1
+    _statements[name] = (sql, n_params)
+
+
+def query(conn, name: str, params: tuple = (), one: bool = False, cursor_factory=None):
+    """Runs a registered statement via EXECUTE, PREPAREing it on this connection first if needed."""
+    sql, n_params = _statements[name]
+    with conn.cursor(cursor_factory=cursor_factory) as cursor:
+        if name not in conn.prepared:
+            cursor.execute(f"PREPARE {name} AS {sql}")
+            conn.prepared.add(name)
+            _count("prepares")
+        placeholders = f" ({', '.join(['%s'] * n_params)})" if n_params else ""
+        cursor.execute(f"EXECUTE {name}{placeholders}", params)
+        _count("prepared_executions")
+        return cursor.fetchone() if one else cursor.fetchall()
+
+
+def stats() -> dict:
+    with _metrics_lock:
+        snapshot = dict(_metrics)
+    snapshot["wait_ms_total"] = round(snapshot["wait_ms_total"], 2)
+    snapshot["pool_max"] = DB_POOL_MAX_CONNECTIONS
+    snapshot["pool_created"] = _pool is not None
+    snapshot["idle"] = max(snapshot["open_connections"] - snapshot["in_use"], 0)
+    snapshot["prepared_statements"] = sorted(_statements)
+    return snapshot
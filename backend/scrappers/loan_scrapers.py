@@ -1,154 +1,343 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-import time
+"""
+JanSamarth scheme scraper.
+
+Two stages, so parsing never needs a browser:
+  1. capture: Selenium (headless Chrome) opens each scheme tab and saves the rendered
+     page HTML to data/snapshots/ (explicit waits, no fixed sleeps).
+  2. parse:   lxml extracts the scheme cards from the saved snapshots. Runs offline,
+     on any OS, in milliseconds - use it to re-process or debug against saved HTML.
+
+Usage:
+  python loan_scrapers.py            # capture + parse
+  python loan_scrapers.py capture    # snapshots only
+  python loan_scrapers.py parse [snapshot_dir]
+
+Re-runs are incremental: every card gets a content fingerprint, only new/changed/
+removed schemes touch the output file, and each run appends one record to
+data/scheme_changes.jsonl that downstream indexes can apply (see scheme_catalogue.py).
+"""
+import argparse
+import datetime
+import hashlib
 import json
 import os
+import re
 
-# Path to chromedriver
-chromedriver_path = r'C:\Users\shree\Downloads\chromedriver-win64\chromedriver-win64\chromedriver.exe'
-
-# Check if chromedriver exists
-if not os.path.exists(chromedriver_path):
-    print(f"ERROR: ChromeDriver not found at {chromedriver_path}")
-    exit(1)
-
-print(f"✓ Using ChromeDriver: {chromedriver_path}")
-print("✓ Starting JanSamarth scraper...\n")
-
-# Create data folder
-os.makedirs('data', exist_ok=True)
-
-# Setup Chrome options
-chrome_options = Options()
-chrome_options.add_argument('--headless')
-chrome_options.add_argument('--start-maximized')
-chrome_options.add_argument('--disable-blink-features=AutomationControlled')
-
-# Create service
-service = Service(chromedriver_path)
-
-# Create driver
-driver = webdriver.Chrome(service=service, options=chrome_options)
-
-try:
-    # Navigate to website
-    print("Loading website...")
-    driver.get("https://www.jansamarth.in/government-of-india-schemes")
-    time.sleep(5)
-    
-    print(f"Page title: {driver.title}\n")
-    
-    # Find all tabs
-    tabs = driver.find_elements(By.CSS_SELECTOR, "[role='tab']")
-    print(f"Found {len(tabs)} tabs\n")
-    
-    if not tabs:
-        print("No tabs found with [role='tab'], trying alternative...")
-        tabs = driver.find_elements(By.XPATH, "//button[contains(@class, 'mat-mdc-tab')]")
-        print(f"Found {len(tabs)} tabs with alternative selector\n")
-    
-    all_schemes = []
-    
-    # Get tab names
+from lxml import html as lxml_html
+
+BASE_URL = "https://www.jansamarth.in/government-of-india-schemes"
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BASE_DIR, 'data')
+SNAPSHOT_DIR = os.path.join(DATA_DIR, 'snapshots')
+OUTPUT_FILE = os.path.join(DATA_DIR, 'jansamarth_schemes.json')
+CHANGE_LOG_FILE = os.path.join(DATA_DIR, 'scheme_changes.jsonl')
+MANIFEST_NAME = 'manifest.json'
+
+# Optional: explicit chromedriver. If unset, Selenium Manager resolves a driver itself.
+CHROMEDRIVER_PATH = os.getenv("CHROMEDRIVER_PATH")
+WAIT_TIMEOUT_SECONDS = int(os.getenv("SCRAPER_WAIT_TIMEOUT", "20"))
+
+TAB_SELECTOR = "[role='tab']"
+TAB_XPATH_FALLBACK = "//button[contains(@class, 'mat-mdc-tab')]"
+CARD_XPATH = "//mat-card | //*[contains(@class, 'mat-mdc-card')] | //*[contains(@class, 'card-content')]"
+PANEL_CARD_XPATH = ".//mat-card | .//*[contains(@class, 'mat-mdc-card')] | .//*[contains(@class, 'card-content')]"
+# Rendered inline: their text continues the current line, as in Selenium's element.text
+INLINE_TAGS = {"a", "abbr", "b", "code", "em", "font", "i", "label", "mark", "small", "span",
+               "strong", "sub", "sup", "u"}
+
+
+# --- Stage 1: Capture (browser) ---
+def create_driver():
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+    from selenium.webdriver.chrome.options import Options
+
+    chrome_options = Options()
+    chrome_options.add_argument('--headless')
+    chrome_options.add_argument('--start-maximized')
+    chrome_options.add_argument('--disable-blink-features=AutomationControlled')
+
+    if CHROMEDRIVER_PATH:
+        if not os.path.exists(CHROMEDRIVER_PATH):
+            raise FileNotFoundError(f"ChromeDriver not found at {CHROMEDRIVER_PATH}")
+        print(f"✓ Using ChromeDriver: {CHROMEDRIVER_PATH}")
+        return webdriver.Chrome(service=Service(CHROMEDRIVER_PATH), options=chrome_options)
+    return webdriver.Chrome(options=chrome_options)
+
+
+def capture_snapshots(snapshot_dir: str = SNAPSHOT_DIR) -> str:
+    """
+    Saves one rendered HTML snapshot per tab plus a manifest
+    {"tabs": {file: tab_name}, "failed": [tab_name, ...]}. Tabs that could not be captured
+    are listed as failed so the parse stage keeps their previous schemes instead of
+    reporting them removed. If no tab is captured, the previous manifest is left as is.
+    """
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+
+    os.makedirs(snapshot_dir, exist_ok=True)
+    driver = create_driver()
+    wait = WebDriverWait(driver, WAIT_TIMEOUT_SECONDS)
+
+    def find_tabs():
+        tabs = driver.find_elements(By.CSS_SELECTOR, TAB_SELECTOR)
+        return tabs or driver.find_elements(By.XPATH, TAB_XPATH_FALLBACK)
+
+    def active_panel_cards(tab_idx):
+        """Cards inside the panel the selected tab controls (not a previous tab's leftovers)."""
+        panel_id = find_tabs()[tab_idx].get_attribute("aria-controls")
+        panels = driver.find_elements(By.ID, panel_id) if panel_id else []
+        return panels[0].find_elements(By.XPATH, PANEL_CARD_XPATH) if panels else []
+
+    manifest = {}
     tab_names = []
-    for tab in tabs:
-        try:
-            tab_names.append(tab.text.strip())
-        except:
-            tab_names.append("Unknown")
-    
-    print(f"Tabs: {tab_names}\n")
-    
-    # Click each tab and scrape
-    for tab_idx, tab_name in enumerate(tab_names):
-        try:
-            print(f"Processing tab {tab_idx + 1}: {tab_name}")
-            
-            # Re-find tabs
-            tabs = driver.find_elements(By.CSS_SELECTOR, "[role='tab']")
-            if not tabs:
-                tabs = driver.find_elements(By.XPATH, "//button[contains(@class, 'mat-mdc-tab')]")
-            
-            if tab_idx < len(tabs):
-                tab = tabs[tab_idx]
-                
-                # Scroll to tab
+    try:
+        print("Loading website...")
+        driver.get(BASE_URL)
+        wait.until(lambda d: find_tabs())
+        print(f"Page title: {driver.title}\n")
+
+        tab_names = [(tab.text or "Unknown").strip() for tab in find_tabs()]
+        print(f"Tabs: {tab_names}\n")
+
+        for tab_idx, tab_name in enumerate(tab_names):
+            try:
+                tab = find_tabs()[tab_idx]
+                previous_cards = driver.find_elements(By.XPATH, CARD_XPATH) if tab_idx else []
                 driver.execute_script("arguments[0].scrollIntoView(true);", tab)
-                time.sleep(1)
-                
                 # Use JavaScript click to avoid interception
                 driver.execute_script("arguments[0].click();", tab)
-                print(f"  ✓ Clicked tab")
-                time.sleep(4)  # Wait for content to load
-                
-                # Scroll to top to see cards
-                driver.execute_script("window.scrollTo(0, 200);")
-                time.sleep(2)
-                
-                # Find all cards in this tab - try multiple selectors
-                cards = driver.find_elements(By.CSS_SELECTOR, "mat-card")
-                
-                if not cards:
-                    cards = driver.find_elements(By.XPATH, "//mat-card | //*[contains(@class, 'mat-mdc-card')] | //*[contains(@class, 'card-content')]")
-                
-                if not cards:
-                    # Look for any div that might contain scheme info
-                    all_divs = driver.find_elements(By.TAG_NAME, "div")
-                    cards = [d for d in all_divs if len(d.find_elements(By.CSS_SELECTOR, "h1, h2, h3")) > 0]
-                
-                print(f"  ✓ Found {len(cards)} cards")
-                
-                # Scroll and scrape all cards
-                for card_idx, card in enumerate(cards):
-                    try:
-                        # Scroll card into view
-                        driver.execute_script("arguments[0].scrollIntoView(true);", card)
-                        time.sleep(1)
-                        
-                        # Get card text
-                        card_text = card.text.strip()
-                        
-                        if card_text:
-                            # Split into lines
-                            lines = [line.strip() for line in card_text.split('\n') if line.strip()]
-                            
-                            # First line is usually the heading
-                            heading = lines[0] if lines else "N/A"
-                            
-                            scheme_data = {
-                                "tab": tab_name,
-                                "scheme_name": heading,
-                                "content": card_text,
-                                "lines": lines
-                            }
-                            
-                            all_schemes.append(scheme_data)
-                            print(f"    ✓ Scraped: {heading[:60]}...")
-                    
-                    except Exception as e:
-                        print(f"    ✗ Error scraping card {card_idx}: {str(e)}")
-                        continue
-        
-        except Exception as e:
-            print(f"✗ Error processing tab {tab_idx}: {str(e)}")
+                wait.until(lambda d: find_tabs()[tab_idx].get_attribute("aria-selected") == "true")
+                if tab.get_attribute("aria-controls"):
+                    wait.until(lambda d: active_panel_cards(tab_idx))
+                else:
+                    # No panel to scope to: wait for the previous tab's cards to leave the DOM
+                    if previous_cards:
+                        wait.until(EC.staleness_of(previous_cards[0]))
+                    wait.until(EC.presence_of_element_located((By.XPATH, CARD_XPATH)))
+
+                file_name = f"tab_{tab_idx:02d}.html"
+                with open(os.path.join(snapshot_dir, file_name), 'w', encoding='utf-8') as f:
+                    f.write(driver.page_source)
+                manifest[file_name] = tab_name
+                print(f"  ✓ Captured tab {tab_idx + 1}: {tab_name}")
+            except Exception as e:
+                print(f"✗ Error capturing tab {tab_idx}: {str(e)}")
+                continue
+    finally:
+        driver.quit()
+        print("\n✓ Browser closed")
+
+    if not manifest:
+        raise RuntimeError("No tabs captured; previous snapshots left in place.")
+    failed = [name for name in tab_names if name not in manifest.values()]
+    with open(os.path.join(snapshot_dir, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump({"tabs": manifest, "failed": failed}, f, indent=2, ensure_ascii=False)
+    return snapshot_dir
+
+
+# --- Stage 2: Parse (offline) ---
+def _element_lines(element) -> list:
+    """
+    Card text split into lines the way Selenium's element.text renders it: inline markup
+    (<b>, <span>, <a>...) stays on its line, block elements and <br> break lines,
+    whitespace runs collapse. Keeps fingerprints and parsed fields stable across the switch.
+    """
+    parts = []
+
+    def text(value):
+        # Newlines inside text nodes are just whitespace; only structure breaks lines
+        parts.append(re.sub(r"\s+", " ", value))
+
+    def walk(el):
+        if not isinstance(el.tag, str) or el.tag in ("script", "style"):
+            return
+        tag = el.tag.lower()
+        block = tag not in INLINE_TAGS
+        if tag == "br" or block:
+            parts.append("\n")
+        if el.text:
+            text(el.text)
+        for child in el:
+            walk(child)
+            if child.tail:
+                text(child.tail)
+        if block:
+            parts.append("\n")
+
+    walk(element)
+    lines = (re.sub(r" +", " ", line).strip() for line in "".join(parts).split("\n"))
+    return [line for line in lines if line]
+
+
+def parse_snapshot(page_html: str, tab_name: str = None) -> list:
+    """Extracts scheme cards from one saved page. Same record shape as the live scraper."""
+    tree = lxml_html.fromstring(page_html)
+
+    if not tab_name:
+        selected = tree.xpath("//*[@role='tab' and @aria-selected='true']")
+        tab_name = " ".join(_element_lines(selected[0])) if selected else "Unknown"
+
+    # Scope to the selected tab's panel when the page says which one it is
+    selected = tree.xpath("//*[@role='tab' and @aria-selected='true']/@aria-controls")
+    panel = tree.xpath(f"//*[@id='{selected[0]}']") if selected else []
+    cards = panel[0].xpath(PANEL_CARD_XPATH) if panel else tree.xpath(CARD_XPATH)
+    if not cards:
+        # Fallback: any div that directly holds a heading
+        cards = tree.xpath("//div[h1 or h2 or h3]")
+    # Nested matches (mat-card > .card-content) would duplicate text: keep outermost only
+    card_set = set(cards)
+    cards = [c for c in cards if not any(a in card_set for a in c.iterancestors())]
+
+    schemes = []
+    for card in cards:
+        lines = _element_lines(card)
+        if not lines:
             continue
-    
-    # Save to JSON
-    output_file = 'data/jansamarth_schemes.json'
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(all_schemes, f, indent=2, ensure_ascii=False)
-    
-    print(f"\n✓ Scraping complete!")
-    print(f"✓ Total schemes scraped: {len(all_schemes)}")
+        schemes.append({
+            "tab": tab_name,
+            "scheme_name": lines[0],
+            "content": "\n".join(lines),
+            "lines": lines
+        })
+    return schemes
+
+
+def read_manifest(snapshot_dir: str = SNAPSHOT_DIR):
+    """({file: tab_name}, failed tab names). Older manifests are a bare {file: tab_name}."""
+    manifest_path = os.path.join(snapshot_dir, MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        return {name: None for name in sorted(os.listdir(snapshot_dir)) if name.endswith('.html')}, []
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    if "tabs" in manifest:
+        return manifest["tabs"], manifest.get("failed", [])
+    return manifest, []
+
+
+def parse_snapshots(snapshot_dir: str = SNAPSHOT_DIR) -> list:
+    tabs, _ = read_manifest(snapshot_dir)
+    all_schemes = []
+    for file_name, tab_name in tabs.items():
+        with open(os.path.join(snapshot_dir, file_name), 'r', encoding='utf-8') as f:
+            schemes = parse_snapshot(f.read(), tab_name)
+        print(f"  ✓ {file_name}: {len(schemes)} cards")
+        all_schemes.extend(schemes)
+    return all_schemes
+
+
+# --- Incremental Save + Change Feed ---
+def fingerprint_scheme(scheme: dict) -> str:
+    """Stable content hash: whitespace-insensitive, covers tab + card text."""
+    normalised = re.sub(r"\s+", " ", f"{scheme.get('tab', '')}\n{scheme.get('content', '')}").strip()
+    return hashlib.sha256(normalised.encode('utf-8')).hexdigest()[:16]
+
+
+def assign_keys(all_schemes: list) -> list:
+    """Adds scheme_key (tab::name, suffixed on duplicates) and fingerprint to each record."""
+    seen = {}
+    for scheme in all_schemes:
+        base_key = f"{scheme.get('tab', '')}::{scheme.get('scheme_name', '')}"
+        seen[base_key] = seen.get(base_key, 0) + 1
+        scheme["scheme_key"] = base_key if seen[base_key] == 1 else f"{base_key}#{seen[base_key]}"
+        scheme["fingerprint"] = fingerprint_scheme(scheme)
+    return all_schemes
+
+
+def diff_schemes(previous: list, current: list) -> dict:
+    old_by_key = {s.get("scheme_key"): s for s in previous}
+    new_keys = {s["scheme_key"] for s in current}
+    added, changed = [], []
+    for scheme in current:
+        old = old_by_key.get(scheme["scheme_key"])
+        if old is None:
+            added.append(scheme)
+        elif old.get("fingerprint") != scheme["fingerprint"]:
+            changed.append(scheme)
+    removed = [key for key in old_by_key if key not in new_keys]
+    return {"added": added, "changed": changed, "removed": removed}
+
+
+def _last_change_seq(change_log_file: str) -> int:
+    if not os.path.exists(change_log_file):
+        return 0
+    last_line = None
+    with open(change_log_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                last_line = line
+    return json.loads(last_line)["seq"] if last_line else 0
+
+
+def load_previous_schemes(output_file: str) -> list:
+    if not os.path.exists(output_file):
+        return []
+    with open(output_file, 'r', encoding='utf-8') as f:
+        previous = json.load(f)
+    # Older files have no keys/fingerprints yet
+    if previous and "fingerprint" not in previous[0]:
+        assign_keys(previous)
+    return previous
+
+
+def save_schemes(all_schemes: list, output_file: str = OUTPUT_FILE, change_log_file: str = CHANGE_LOG_FILE,
+                 failed_tabs: list = ()) -> dict:
+    """
+    Writes the scheme file only if something changed and appends a compact change
+    record {seq, generated_at, output_sha256, added, changed, removed} to the change log.
+    Schemes of `failed_tabs` (not captured this run) are carried over unchanged, never removed.
+    """
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    previous = load_previous_schemes(output_file)
+    if failed_tabs:
+        carried = [s for s in previous if s.get("tab") in failed_tabs]
+        print(f"⚠ Keeping {len(carried)} previous schemes for uncaptured tabs: {list(failed_tabs)}")
+        all_schemes = all_schemes + carried
+    assign_keys(all_schemes)
+    changes = diff_schemes(previous, all_schemes)
+    counts = {k: len(v) for k, v in changes.items()}
+
+    if not any(counts.values()):
+        print(f"\n✓ No scheme changes ({len(all_schemes)} schemes). {output_file} left untouched.")
+        return changes
+
+    payload = json.dumps(all_schemes, indent=2, ensure_ascii=False).encode('utf-8')
+    tmp_file = output_file + ".tmp"
+    with open(tmp_file, 'wb') as f:
+        f.write(payload)
+    os.replace(tmp_file, output_file)
+
+    record = {
+        "seq": _last_change_seq(change_log_file) + 1,
+        "generated_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        # Ties the written scheme file to this seq (scheme_catalogue.py full rebuilds check it)
+        "output_sha256": hashlib.sha256(payload).hexdigest(),
+        **changes
+    }
+    with open(change_log_file, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + "\n")
+
+    print(f"\n✓ Total schemes scraped: {len(all_schemes)}")
+    print(f"✓ Changes (seq {record['seq']}): +{counts['added']} ~{counts['changed']} -{counts['removed']}")
     print(f"✓ Data saved to: {output_file}")
+    return changes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JanSamarth scheme scraper")
+    parser.add_argument("mode", nargs="?", choices=["all", "capture", "parse"], default="all")
+    parser.add_argument("snapshot_dir", nargs="?", default=SNAPSHOT_DIR)
+    args = parser.parse_args()
+
+    if args.mode in ("all", "capture"):
+        print("✓ Starting JanSamarth scraper...\n")
+        capture_snapshots(args.snapshot_dir)
+    if args.mode in ("all", "parse"):
+        print(f"Parsing snapshots in {args.snapshot_dir}")
+        _, failed_tabs = read_manifest(args.snapshot_dir)
+        save_schemes(parse_snapshots(args.snapshot_dir), failed_tabs=failed_tabs)
 
-except Exception as e:
-    print(f"\n✗ Error: {str(e)}")
-    import traceback
-    traceback.print_exc()
 
-finally:
-    driver.quit()
-    print("\n✓ Browser closed")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
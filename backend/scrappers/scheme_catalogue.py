@@ -0,0 +1,267 @@
+"""
+Post-processing stage: raw scraped scheme cards -> typed, indexed scheme catalogue.
+
+Reads data/jansamarth_schemes.json (written by loan_scrapers.py), extracts structured
+fields from each card's text (purpose, max loan amount, interest rate, subsidy,
+collateral, eligibility) and writes a compact data/scheme_catalogue.json with
+pre-built indexes, so consumers like the Sales Agent can filter schemes in memory.
+
+Incremental mode applies the change records loan_scrapers.py appends to
+data/scheme_changes.jsonl, re-parsing only added/changed cards.
+
+Run:  python scheme_catalogue.py [--incremental] [--input ...] [--output ...]
+"""
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import re
+from dataclasses import dataclass, field, asdict
+from typing import List, Optional
+
+CATALOGUE_VERSION = 2  # v2: records carry scheme_key for incremental updates
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_INPUT = os.path.join(BASE_DIR, 'data', 'jansamarth_schemes.json')
+DEFAULT_OUTPUT = os.path.join(BASE_DIR, 'data', 'scheme_catalogue.json')
+DEFAULT_CHANGE_LOG = os.path.join(BASE_DIR, 'data', 'scheme_changes.jsonl')
+
+# --- Normalised Loan Purposes ---
+PURPOSE_KEYWORDS = {
+    "business": ["business", "msme", "enterprise", "micro", "udyam", "entrepreneur", "startup",
+                 "manufacturing", "trading", "mudra", "working capital", "vendor"],
+    "agriculture": ["agri", "farm", "kisan", "crop", "dairy", "fisheries", "animal husbandry", "tractor"],
+    "education": ["education", "student", "study", "vidya", "college"],
+    "housing": ["housing", "house", "home", "awas", "pmay"],
+    "livelihood": ["livelihood", "self help group", "shg", "street vendor", "artisan", "weaver"],
+    "export": ["export"],
+    "energy": ["solar", "renewable", "rooftop"],
+}
+
+# --- Field Extractors (compiled once) ---
+AMOUNT_PATTERN = re.compile(
+    r"(?:₹|\b(?:rs\.?|inr|rupees))\s*([\d,]+(?:\.\d+)?)\s*(?:(lakhs?|lacs?|crores?|cr|thousand|k)\b)?"
+    r"|([\d,]+(?:\.\d+)?)\s*(lakhs?|lacs?|crores?|cr)\b",
+    re.IGNORECASE,
+)
+PERCENT_PATTERN = re.compile(r"(\d{1,2}(?:\.\d{1,2})?)\s*%")
+UNIT_MULTIPLIERS = {"lakh": 1e5, "lac": 1e5, "crore": 1e7, "cr": 1e7, "thousand": 1e3, "k": 1e3}
+
+
+@dataclass
+class SchemeRecord:
+    scheme_id: int
+    name: str
+    category: str
+    purposes: List[str] = field(default_factory=list)
+    max_amount: Optional[int] = None        # INR
+    min_interest_rate: Optional[float] = None
+    max_interest_rate: Optional[float] = None
+    subsidy_percent: Optional[float] = None
+    collateral_free: bool = False
+    eligibility: List[str] = field(default_factory=list)
+    summary: str = ""
+    scheme_key: Optional[str] = None        # tab::name, stable across re-scrapes
+
+
+def parse_amount(number: str, unit: Optional[str]) -> Optional[int]:
+    try:
+        value = float(number.replace(',', ''))
+    except ValueError:
+        return None
+    if unit:
+        unit = unit.lower().rstrip('s')
+        value *= UNIT_MULTIPLIERS.get(unit, 1)
+    return int(value)
+
+
+def extract_amounts(text: str) -> List[int]:
+    amounts = []
+    for m in AMOUNT_PATTERN.finditer(text):
+        number, unit = (m.group(1), m.group(2)) if m.group(1) else (m.group(3), m.group(4))
+        amount = parse_amount(number, unit)
+        if amount:
+            amounts.append(amount)
+    return amounts
+
+
+def extract_purposes(text: str) -> List[str]:
+    lowered = text.lower()
+    return [p for p, words in PURPOSE_KEYWORDS.items() if any(w in lowered for w in words)]
+
+
+def extract_rates(lines: List[str]):
+    """Interest % figures only from lines that talk about interest/rates."""
+    rates = []
+    for line in lines:
+        lowered = line.lower()
+        if "interest" in lowered or "rate" in lowered or "roi" in lowered:
+            rates.extend(float(r) for r in PERCENT_PATTERN.findall(line))
+    rates = [r for r in rates if 0 < r < 30]
+    return (min(rates), max(rates)) if rates else (None, None)
+
+
+def extract_subsidy(lines: List[str]) -> Optional[float]:
+    figures = []
+    for line in lines:
+        if "subsid" in line.lower():
+            figures.extend(float(p) for p in PERCENT_PATTERN.findall(line))
+    return max(figures) if figures else None
+
+
+def extract_eligibility(lines: List[str], limit: int = 5) -> List[str]:
+    """Lines under an 'Eligibility' heading, or lines that state who is eligible."""
+    picked, in_section = [], False
+    for line in lines:
+        lowered = line.lower()
+        if "eligib" in lowered and len(line) < 40:
+            in_section = True
+            continue
+        if in_section or "eligible" in lowered or "who can" in lowered:
+            picked.append(line)
+        if len(picked) >= limit:
+            break
+    return picked
+
+
+def parse_card(scheme_id: int, card: dict) -> SchemeRecord:
+    lines = card.get("lines") or [l.strip() for l in card.get("content", "").split('\n') if l.strip()]
+    text = card.get("content") or "\n".join(lines)
+    category = card.get("tab", "")
+    amounts = extract_amounts(text)
+    min_rate, max_rate = extract_rates(lines)
+    lowered = text.lower()
+
+    return SchemeRecord(
+        scheme_id=scheme_id,
+        name=card.get("scheme_name") or (lines[0] if lines else "N/A"),
+        category=category,
+        purposes=extract_purposes(f"{category}\n{text}"),
+        max_amount=max(amounts) if amounts else None,
+        min_interest_rate=min_rate,
+        max_interest_rate=max_rate,
+        subsidy_percent=extract_subsidy(lines),
+        collateral_free=("collateral free" in lowered or "without collateral" in lowered
+                         or "no collateral" in lowered or "collateral-free" in lowered),
+        eligibility=extract_eligibility(lines[1:]),
+        summary=" ".join(lines[1:4])[:300],
+        scheme_key=card.get("scheme_key"),
+    )
+
+
+def _index_catalogue(records: List[dict], last_change_seq: int = 0) -> dict:
+    """Assigns positional scheme_ids and (re)builds the lookup indexes."""
+    by_purpose = {}
+    for i, r in enumerate(records):
+        r["scheme_id"] = i
+        for p in r["purposes"]:
+            by_purpose.setdefault(p, []).append(i)
+
+    # Scheme ids ordered by max_amount (unknown amounts excluded) -> bisect range queries
+    with_amount = sorted((r for r in records if r["max_amount"] is not None), key=lambda r: r["max_amount"])
+
+    return {
+        "version": CATALOGUE_VERSION,
+        "generated_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "last_change_seq": last_change_seq,
+        "schemes": records,
+        "indexes": {
+            "purpose": by_purpose,
+            "by_max_amount": [r["scheme_id"] for r in with_amount],
+        },
+    }
+
+
+def build_catalogue(cards: List[dict], last_change_seq: int = 0) -> dict:
+    """Parses all cards and builds the lookup indexes."""
+    records = [asdict(parse_card(i, card)) for i, card in enumerate(cards)]
+    return _index_catalogue(records, last_change_seq)
+
+
+def read_change_log(change_log_path: str, after_seq: int = 0) -> List[dict]:
+    if not os.path.exists(change_log_path):
+        return []
+    with open(change_log_path, 'r', encoding='utf-8') as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    return [r for r in records if r["seq"] > after_seq]
+
+
+def seq_for_input(input_bytes: bytes, change_records: List[dict]) -> int:
+    """
+    Seq of the change record whose capture wrote exactly these scheme-file bytes, else 0.
+    A hand-edited or legacy input isn't tied to any record, so it must not claim one.
+    """
+    digest = hashlib.sha256(input_bytes).hexdigest()
+    for record in reversed(change_records):
+        if record.get("output_sha256") == digest:
+            return record["seq"]
+    return 0
+
+
+def apply_changes(catalogue: dict, change_records: List[dict]) -> dict:
+    """Applies change-log records in order; only added/changed cards are re-parsed."""
+    if any(not r.get("scheme_key") for r in catalogue["schemes"]):
+        # Keyless records (built from a legacy scheme file) can't be matched to changes
+        raise ValueError("Catalogue has records without scheme_key; a full rebuild is required.")
+    by_key = {r["scheme_key"]: r for r in catalogue["schemes"]}
+    last_seq = catalogue.get("last_change_seq", 0)
+    for change in change_records:
+        for key in change.get("removed", []):
+            by_key.pop(key, None)
+        for card in change.get("added", []) + change.get("changed", []):
+            by_key[card["scheme_key"]] = asdict(parse_card(0, card))
+        last_seq = change["seq"]
+    return _index_catalogue(list(by_key.values()), last_seq)
+
+
+def write_catalogue(catalogue: dict, output_path: str):
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    tmp_path = output_path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(catalogue, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_path, output_path)  # atomic swap, readers never see a half-written file
+
+
+def load_catalogue(path: str) -> Optional[dict]:
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        catalogue = json.load(f)
+    return catalogue if catalogue.get("version") == CATALOGUE_VERSION else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the structured scheme catalogue")
+    parser.add_argument("--input", default=DEFAULT_INPUT)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--change-log", default=DEFAULT_CHANGE_LOG)
+    parser.add_argument("--incremental", action="store_true",
+                        help="Apply pending change-log records instead of re-parsing every card")
+    args = parser.parse_args()
+
+    existing = load_catalogue(args.output) if args.incremental else None
+    if existing is not None and any(not r.get("scheme_key") for r in existing["schemes"]):
+        print("⚠ Catalogue has records without scheme_key (legacy input); doing a full rebuild.")
+        existing = None
+    if existing is not None:
+        pending = read_change_log(args.change_log, existing.get("last_change_seq", 0))
+        if not pending:
+            print(f"✓ Catalogue already up to date (seq {existing.get('last_change_seq', 0)}).")
+            return
+        catalogue = apply_changes(existing, pending)
+        print(f"✓ Applied {len(pending)} change record(s).")
+    else:
+        with open(args.input, 'rb') as f:
+            input_bytes = f.read()
+        cards = json.loads(input_bytes.decode('utf-8'))
+        # Only a seq from the capture that produced this exact file; 0 replays the whole log next time
+        catalogue = build_catalogue(cards, seq_for_input(input_bytes, read_change_log(args.change_log)))
+
+    write_catalogue(catalogue, args.output)
+    print(f"✓ Catalogue built: {len(catalogue['schemes'])} schemes, "
+          f"{len(catalogue['indexes']['purpose'])} purposes -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from loan_scrapers import assign_keys, diff_schemes, parse_snapshot, save_schemes  # noqa: E402
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "jansamarth_business_tab.html")
+
+
+def load_fixture():
+    with open(FIXTURE, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def scheme(tab, name, content):
+    return {"tab": tab, "scheme_name": name, "content": content, "lines": content.split("\n")}
+
+
+# --- parse_snapshot ---
+def test_parse_snapshot_reads_selected_tab_only():
+    schemes = parse_snapshot(load_fixture())
+    assert [s["scheme_name"] for s in schemes] == [
+        "Pradhan Mantri MUDRA Yojana (PMMY)",
+        "Prime Minister's Employment Generation Programme (PMEGP)",
+    ]
+    assert {s["tab"] for s in schemes} == {"Business Activity Loan"}
+
+
+def test_parse_snapshot_renders_lines_like_selenium():
+    mudra = parse_snapshot(load_fixture())[0]
+    assert mudra["lines"] == [
+        "Pradhan Mantri MUDRA Yojana (PMMY)",
+        "Loans up to ₹10 lakh for micro enterprises.",
+        "Nodal agency: MUDRA",
+        "Interest: as per bank norms",
+    ]
+    assert mudra["content"] == "\n".join(mudra["lines"])
+
+
+def test_parse_snapshot_uses_given_tab_name():
+    schemes = parse_snapshot(load_fixture(), "Business")
+    assert {s["tab"] for s in schemes} == {"Business"}
+
+
+# --- diff_schemes ---
+def test_diff_schemes_reports_added_changed_removed():
+    previous = assign_keys([scheme("Business", "A", "A\nold"), scheme("Business", "B", "B\nsame"),
+                            scheme("Business", "C", "C\ngone")])
+    current = assign_keys([scheme("Business", "A", "A\nnew"), scheme("Business", "B", "B\n  same "),
+                           scheme("Business", "D", "D\nfresh")])
+    changes = diff_schemes(previous, current)
+    assert [s["scheme_name"] for s in changes["added"]] == ["D"]
+    assert [s["scheme_name"] for s in changes["changed"]] == ["A"]   # whitespace-only edit to B is not a change
+    assert changes["removed"] == ["Business::C"]
+
+
+def test_assign_keys_suffixes_duplicate_names():
+    keyed = assign_keys([scheme("T", "Same", "Same\n1"), scheme("T", "Same", "Same\n2")])
+    assert [s["scheme_key"] for s in keyed] == ["T::Same", "T::Same#2"]
+
+
+# --- save_schemes ---
+def test_save_schemes_writes_only_on_change(tmp_path):
+    output, change_log = str(tmp_path / "schemes.json"), str(tmp_path / "changes.jsonl")
+
+    first = save_schemes(parse_snapshot(load_fixture()), output, change_log)
+    assert len(first["added"]) == 2
+    mtime = os.path.getmtime(output)
+
+    again = save_schemes(parse_snapshot(load_fixture()), output, change_log)
+    assert not any(again.values())
+    assert os.path.getmtime(output) == mtime
+    with open(change_log, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    assert [r["seq"] for r in records] == [1]
+
+
+def test_save_schemes_keeps_failed_tabs(tmp_path):
+    output, change_log = str(tmp_path / "schemes.json"), str(tmp_path / "changes.jsonl")
+    save_schemes([scheme("Business", "A", "A\nx"), scheme("Education", "E", "E\ny")], output, change_log)
+
+    changes = save_schemes([scheme("Business", "A", "A\nx2")], output, change_log, failed_tabs=["Education"])
+    assert changes["removed"] == []
+    assert [s["scheme_name"] for s in changes["changed"]] == ["A"]
+    with open(output, encoding="utf-8") as f:
+        assert {s["scheme_name"] for s in json.load(f)} == {"A", "E"}
+    with open(change_log, encoding="utf-8") as f:
+        assert [json.loads(line)["seq"] for line in f] == [1, 2]